@@ -6,7 +6,15 @@ from flask_cors import CORS
 from flasgger import Swagger
 import logging
 from .models import db
+from .cache import response_cache
 from .routes import api_bp
+from .cli import register_commands
+from .replica import init_read_routing
+from .sharding import init_sharding
+from .jobs import init_jobs
+from .activity import activity_log
+from .bus import bus
+from .access import init_access, is_token_revoked
 
 def create_app(config_name='default'):
     """
@@ -31,6 +39,11 @@ def create_app(config_name='default'):
     app.logger.info(f"TESTING: {app.config.get('TESTING')}")
     
     jwt = JWTManager(app)
+    response_cache.init_app(app)
+    init_jobs(app)
+    activity_log.init_app(app)
+    bus.init_app(app)
+    init_access(app)
 
     # Set JWT algorithm explicitly
     app.config['JWT_ALGORITHM'] = app.config.get('JWT_ALGORITHM', 'HS256')
@@ -59,6 +72,12 @@ def create_app(config_name='default'):
     # Register blueprints
     app.register_blueprint(api_bp)
 
+    # Send GET requests to the read replica when one is configured
+    init_read_routing(app)
+
+    # Register CLI commands
+    register_commands(app)
+
     # JWT error handlers
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
@@ -74,6 +93,17 @@ def create_app(config_name='default'):
             'error': 'invalid_token'
         }), 401
 
+    @jwt.token_in_blocklist_loader
+    def token_revoked_check(jwt_header, jwt_payload):
+        return is_token_revoked(jwt_payload['jti'])
+
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return jsonify({
+            'message': 'Token has been revoked',
+            'error': 'token_revoked'
+        }), 401
+
     @jwt.unauthorized_loader
     def missing_token_callback(error):
         return jsonify({
@@ -81,8 +111,14 @@ def create_app(config_name='default'):
             'error': 'authorization_required'
         }), 401
 
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Tests build their tables from the models; everywhere else the
+    # migrations define the schema (`flask db upgrade`). Only the primary:
+    # shards are prepared below and db remembers binds of earlier apps.
+    if app.config.get('TESTING'):
+        with app.app_context():
+            db.create_all(bind_key=None)
+
+    # Route board data to its shard (and create the shards' tables)
+    init_sharding(app)
 
     return app
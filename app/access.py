@@ -0,0 +1,112 @@
+import threading
+import time
+from .models import db, UserBoard, RevokedToken
+from .bus import bus, BOARD_DELETED, MEMBERSHIP_CHANGED, TOKEN_REVOKED
+
+class TTLCache:
+    """
+    Bounded, thread-safe map whose entries expire after ttl seconds. The
+    TTL bounds how stale an entry can get if an invalidation is missed; a
+    TTL of 0 turns the cache off.
+    """
+
+    def __init__(self, ttl=60, max_entries=100000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (now + self.ttl, value)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_where(self, predicate):
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items() if not predicate(k)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+# (user_id, board_id) -> True for confirmed memberships. Only positive
+# answers are kept, so adding a member never needs an invalidation.
+memberships = TTLCache()
+
+# jti -> whether the token was revoked when last checked
+token_states = TTLCache()
+
+def init_access(app):
+    """
+    Size the caches from config. Call after bus.init_app: without a bus
+    backend other processes never hear of removed members or revoked
+    tokens, so the membership cache is turned off and token checks are
+    only cached for TOKEN_CHECK_TTL_WITHOUT_BUS seconds, which saves a
+    query on most authenticated requests while keeping a revoked token
+    usable elsewhere only briefly.
+    """
+    shared = bus.backend is not None
+    memberships.ttl = app.config['MEMBERSHIP_CACHE_TTL'] if shared else 0
+    memberships.max_entries = app.config['MEMBERSHIP_CACHE_SIZE']
+    token_states.ttl = app.config['TOKEN_CHECK_TTL' if shared else 'TOKEN_CHECK_TTL_WITHOUT_BUS']
+    token_states.max_entries = app.config['MEMBERSHIP_CACHE_SIZE']
+    if not shared:
+        _reset()
+
+def is_member(user_id, board_id):
+    """
+    Whether the user belongs to the board, answered from this process's
+    cache when possible. For read endpoints; writes check the database.
+    """
+    if memberships.get((user_id, board_id)):
+        return True
+    if db.session.get(UserBoard, (user_id, board_id)) is None:
+        return False
+    memberships.set((user_id, board_id), True)
+    return True
+
+def is_token_revoked(jti):
+    revoked = token_states.get(jti)
+    if revoked is None:
+        revoked = db.session.get(RevokedToken, jti) is not None
+        token_states.set(jti, revoked)
+    return revoked
+
+def _board_deleted(board_id):
+    # SQLite can hand a deleted board's id to the next new board
+    memberships.discard_where(lambda key: key[1] == board_id)
+
+def _membership_changed(user_id, board_id):
+    memberships.discard((user_id, board_id))
+
+def _token_revoked(jti):
+    token_states.set(jti, True)
+
+def _reset():
+    memberships.clear()
+    token_states.clear()
+
+bus.subscribe(BOARD_DELETED, _board_deleted)
+bus.subscribe(MEMBERSHIP_CHANGED, _membership_changed)
+bus.subscribe(TOKEN_REVOKED, _token_revoked)
+bus.on_reset(_reset)
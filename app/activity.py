@@ -0,0 +1,173 @@
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from .models import db, Activity, Board, User
+from .replica import RoutingSession
+from .sharding import shard_for_id
+
+logger = logging.getLogger(__name__)
+
+class ActivityLog:
+    """
+    Write-behind buffer for board activity. Entries recorded during a
+    request join this process's buffer when the request's transaction
+    commits. A background thread inserts them in batches every
+    ACTIVITY_FLUSH_INTERVAL seconds, or as soon as ACTIVITY_FLUSH_SIZE are
+    waiting. Whatever is left is flushed when the process exits. Entries
+    still buffered when a process is killed outright are lost.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.dropped = 0
+        self._events = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._exit_hook = False
+
+    def init_app(self, app):
+        if self.app is not None and self.app is not app:
+            # Entries recorded through an earlier app belong to its databases
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Activity flush failed")
+                with self._lock:
+                    self.dropped += len(self._events)
+                    self._events = []
+        self.app = app
+        self.enabled = app.config['ACTIVITY_ENABLED']
+        self.interval = app.config['ACTIVITY_FLUSH_INTERVAL']
+        self.flush_size = app.config['ACTIVITY_FLUSH_SIZE']
+        self.max_buffer = app.config['ACTIVITY_MAX_BUFFER']
+        app.extensions['activity'] = self
+        if not self._exit_hook:
+            atexit.register(self.flush)
+            self._exit_hook = True
+
+    def add(self, events):
+        if not self.enabled or not events:
+            return
+        with self._lock:
+            self._events.extend(events)
+            # If the database is unreachable for long, keep the newest entries
+            overflow = len(self._events) - self.max_buffer
+            if overflow > 0:
+                del self._events[:overflow]
+                self.dropped += overflow
+                logger.warning(f"Activity buffer full, dropped {overflow} entries")
+            full = len(self._events) >= self.flush_size
+        self._ensure_flusher()
+        if full:
+            self._wakeup.set()
+
+    def _ensure_flusher(self):
+        # One flusher thread per process, started on first use so a forked
+        # worker starts its own instead of inheriting a dead one
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._thread = threading.Thread(target=self._run, name='activity-flusher', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Activity flush failed")
+
+    def flush(self):
+        """
+        Insert every buffered entry now. Returns the number written. On a
+        database error the entries go back into the buffer for the next try.
+        """
+        with self._lock:
+            events, self._events = self._events, []
+        if not events or self.app is None:
+            return 0
+
+        # Entries go to the shard of their board, one batch per shard
+        by_shard = {}
+        with self.app.app_context():
+            for event in events:
+                by_shard.setdefault(shard_for_id(event['board_id']), []).append(event)
+
+        written = 0
+        for shard, batch in sorted(by_shard.items()):
+            with self.app.app_context():
+                g.shard = shard
+                try:
+                    written += self._insert(batch)
+                except Exception:
+                    db.session.rollback()
+                    unwritten = [e for s, b in sorted(by_shard.items()) if s >= shard for e in b]
+                    with self._lock:
+                        self._events[:0] = unwritten
+                    raise
+        return written
+
+    def _insert(self, events):
+        try:
+            db.session.execute(db.insert(Activity), events)
+            db.session.commit()
+            return len(events)
+        except IntegrityError:
+            # A board or user was deleted after the entry was recorded
+            db.session.rollback()
+
+        board_ids = db.session.execute(
+            db.select(Board.id).where(Board.id.in_({e['board_id'] for e in events}))
+        ).scalars().all()
+        user_ids = db.session.execute(
+            db.select(User.id).where(User.id.in_({e['user_id'] for e in events if e['user_id']}))
+        ).scalars().all()
+        board_ids, user_ids = set(board_ids), set(user_ids)
+        events = [
+            {**e, 'user_id': e['user_id'] if e['user_id'] in user_ids else None}
+            for e in events if e['board_id'] in board_ids
+        ]
+        if events:
+            db.session.execute(db.insert(Activity), events)
+            db.session.commit()
+        return len(events)
+
+    def stats(self):
+        with self._lock:
+            return {'buffered': len(self._events), 'dropped': self.dropped}
+
+activity_log = ActivityLog()
+
+def record(board_id, user_id, action, target_id=None, **data):
+    """
+    Add an activity entry for the current transaction. It is buffered when
+    the transaction commits and discarded if it rolls back.
+    """
+    db.session.info.setdefault('pending_activity', []).append({
+        'board_id': board_id,
+        'user_id': user_id,
+        'action': action,
+        'target_id': target_id,
+        'data': data,
+        'created_at': datetime.utcnow()
+    })
+
+@event.listens_for(RoutingSession, 'after_commit')
+def buffer_pending_activity(session):
+    activity_log.add(session.info.pop('pending_activity', None))
+
+@event.listens_for(RoutingSession, 'after_soft_rollback')
+def drop_pending_activity(session, previous_transaction):
+    session.info.pop('pending_activity', None)
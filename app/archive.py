@@ -0,0 +1,99 @@
+from collections import Counter
+from datetime import datetime
+from .models import db, Card, ArchivedCard
+from . import counters
+
+# Columns copied between card and archived_card
+CARD_COLUMNS = ('id', 'title', 'description', 'list_id', 'board_id', 'position', 'created_at', 'updated_at',
+                'version')
+
+# Card ids per statement, well under SQLite's bound parameter limit
+ID_BATCH_SIZE = 500
+
+def _lock_matching(model, criteria):
+    """
+    Select (and on PostgreSQL lock) the rows matching criteria once, so the
+    copy and the delete that follow act on exactly these rows even if cards
+    are added or changed in the meantime.
+    """
+    return db.session.execute(
+        db.select(model.id, model.list_id, model.board_id).where(*criteria).with_for_update()
+    ).all()
+
+def _batches(ids):
+    for start in range(0, len(ids), ID_BATCH_SIZE):
+        yield ids[start:start + ID_BATCH_SIZE]
+
+def _counts_per_list(rows):
+    return Counter((row.list_id, row.board_id) for row in rows).items()
+
+def archive_cards(*criteria):
+    """
+    Move every card matching criteria into archived_card with INSERT ...
+    SELECT and DELETE by id, and update the board counters. Returns the
+    number of cards archived.
+    """
+    rows = _lock_matching(Card, criteria)
+    if not rows:
+        return 0
+
+    archived_at = db.literal(datetime.utcnow(), db.DateTime)
+    for batch in _batches([row.id for row in rows]):
+        db.session.execute(
+            db.insert(ArchivedCard).from_select(
+                [*CARD_COLUMNS, 'archived_at'],
+                db.select(*(getattr(Card, name) for name in CARD_COLUMNS), archived_at)
+                .where(Card.id.in_(batch))
+            )
+        )
+        db.session.execute(
+            db.delete(Card).where(Card.id.in_(batch)),
+            execution_options={'synchronize_session': False}
+        )
+
+    for (list_id, board_id), count in _counts_per_list(rows):
+        counters.card_removed(list_id, board_id, count)
+    return len(rows)
+
+def restore_cards(*criteria):
+    """
+    Move archived cards matching criteria back into card, keeping their
+    original ids unless a newer card has taken one. Returns the number of
+    cards restored.
+    """
+    rows = _lock_matching(ArchivedCard, criteria)
+    if not rows:
+        return 0
+
+    other_columns = CARD_COLUMNS[1:]
+    for batch in _batches([row.id for row in rows]):
+        # Ids a newer card has taken since archiving (SQLite can reuse ids);
+        # those cards are restored under a new id after the others
+        taken_ids = db.session.execute(
+            db.select(Card.id).where(Card.id.in_(batch))
+        ).scalars().all()
+
+        db.session.execute(
+            db.insert(Card).from_select(
+                CARD_COLUMNS,
+                db.select(*(getattr(ArchivedCard, name) for name in CARD_COLUMNS))
+                .where(ArchivedCard.id.in_(batch), ArchivedCard.id.not_in(taken_ids))
+            )
+        )
+        if taken_ids:
+            db.session.execute(
+                db.insert(Card).from_select(
+                    other_columns,
+                    db.select(*(getattr(ArchivedCard, name) for name in other_columns))
+                    .where(ArchivedCard.id.in_(taken_ids))
+                )
+            )
+
+        db.session.execute(
+            db.delete(ArchivedCard).where(ArchivedCard.id.in_(batch)),
+            execution_options={'synchronize_session': False}
+        )
+
+    for (list_id, board_id), count in _counts_per_list(rows):
+        counters.card_added(list_id, board_id, count)
+    return len(rows)
@@ -0,0 +1,259 @@
+import fcntl
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from collections import defaultdict
+from sqlalchemy import event
+from werkzeug.utils import import_string
+from .models import db
+from .replica import RoutingSession
+
+logger = logging.getLogger(__name__)
+
+# Event kinds and their arguments
+BOARD_CHANGED = 'board'  # (board_id,): the board, its lists, cards or members changed
+BOARD_DELETED = 'board_deleted'  # (board_id,)
+MEMBERSHIP_CHANGED = 'membership'  # (user_id, board_id): the user left the board
+TOKEN_REVOKED = 'token'  # (jti,)
+
+class BusBackend:
+    """
+    Transport between processes. publish() sends a list of events to every
+    other process; the listener thread started by listen() passes each
+    received list to on_message, and calls on_reset when messages may have
+    been missed (e.g. after a lost connection) so caches can start over.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def publish(self, message):
+        raise NotImplementedError
+
+    def listen(self, on_message, on_reset):
+        raise NotImplementedError
+
+class PostgresBusBackend(BusBackend):
+    """
+    LISTEN/NOTIFY on INVALIDATION_BUS_CHANNEL of the primary database. The
+    listener holds its own connection, outside the pool.
+    """
+
+    # NOTIFY payloads must stay under 8000 bytes
+    MAX_PAYLOAD = 7500
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.channel = app.config['INVALIDATION_BUS_CHANNEL']
+
+    def publish(self, message):
+        payload = json.dumps(message)
+        if len(payload) > self.MAX_PAYLOAD:
+            # Too many events for one notification: tell listeners to reset instead
+            payload = json.dumps({'origin': message['origin'], 'reset': True})
+        with db.engine.connect() as conn:
+            conn.execute(db.text('SELECT pg_notify(:channel, :payload)'),
+                         {'channel': self.channel, 'payload': payload})
+            conn.commit()
+
+    def listen(self, on_message, on_reset):
+        while True:
+            try:
+                with self.app.app_context():
+                    engine = db.engine
+                cargs, cparams = engine.dialect.create_connect_args(engine.url)
+                conn = engine.dialect.connect(*cargs, **cparams)
+            except Exception:
+                logger.exception('Invalidation bus could not connect, retrying')
+                time.sleep(1)
+                continue
+            try:
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f'LISTEN "{self.channel}"')
+                # Anything published while we were disconnected is lost
+                on_reset()
+                while True:
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        on_message(json.loads(conn.notifies.pop(0).payload))
+            except Exception:
+                logger.exception('Invalidation bus connection lost, reconnecting')
+                time.sleep(1)
+            finally:
+                conn.close()
+
+class FileBusBackend(BusBackend):
+    """
+    Shares events through an append-only file (INVALIDATION_BUS_FILE),
+    polled every INVALIDATION_BUS_POLL_INTERVAL seconds. For tests and for
+    several processes on one machine without PostgreSQL. Once the file
+    reaches INVALIDATION_BUS_FILE_MAX_BYTES the next publisher empties it,
+    and listeners reset.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.path = app.config['INVALIDATION_BUS_FILE']
+        self.interval = app.config['INVALIDATION_BUS_POLL_INTERVAL']
+        self.max_bytes = app.config['INVALIDATION_BUS_FILE_MAX_BYTES']
+
+    def publish(self, message):
+        line = (json.dumps(message) + '\n').encode()
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            # Publishers take turns, so a truncation never drops another's line
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size + len(line) > self.max_bytes:
+                os.ftruncate(fd, 0)
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def listen(self, on_message, on_reset):
+        offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        partial = b''
+        while True:
+            time.sleep(self.interval)
+            try:
+                if os.path.getsize(self.path) < offset:
+                    # Truncated or replaced: start from the top
+                    offset, partial = 0, b''
+                    on_reset()
+                with open(self.path, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            offset += len(data)
+            *lines, partial = (partial + data).split(b'\n')
+            try:
+                messages = [json.loads(line) for line in lines]
+            except ValueError:
+                # Emptied and refilled past our offset between two polls
+                logger.warning('Invalidation bus file was rewritten under the listener, resetting')
+                offset, partial = os.path.getsize(self.path), b''
+                on_reset()
+                continue
+            for message in messages:
+                on_message(message)
+
+class InvalidationBus:
+    """
+    Broadcasts cache invalidation events between server processes. Events
+    recorded during a request are applied to this process's caches and
+    published once the transaction commits, and dropped if it rolls back.
+    Every process runs a listener thread that applies the events the others
+    publish. Without a backend (one process, or SQLite) events are only
+    applied locally.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.origin = None
+        self.received = 0
+        self.published = 0
+        self.resets = 0
+        self._handlers = defaultdict(list)
+        self._reset_handlers = []
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        backend = app.config.get('INVALIDATION_BUS_BACKEND')
+        if backend is None and app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+            backend = 'app.bus:PostgresBusBackend'
+        self.backend = import_string(backend)(app) if backend else None
+        app.extensions['invalidation_bus'] = self
+        app.before_request(self.ensure_listener)
+
+    def subscribe(self, kind, handler):
+        self._handlers[kind].append(handler)
+
+    def on_reset(self, handler):
+        """Register a handler for when events may have been missed."""
+        self._reset_handlers.append(handler)
+
+    def apply(self, events):
+        for kind, *args in events:
+            for handler in self._handlers[kind]:
+                handler(*args)
+
+    def reset(self):
+        self.resets += 1
+        for handler in self._reset_handlers:
+            handler()
+
+    def publish(self, events):
+        """Apply events locally and send them to the other processes."""
+        events = list(dict.fromkeys(tuple(entry) for entry in events))
+        self.apply(events)
+        if self.backend is None:
+            return
+        self.ensure_listener()
+        try:
+            self.backend.publish({'origin': self.origin, 'events': events})
+            self.published += len(events)
+        except Exception:
+            # The caches' TTLs bound how long other processes stay stale
+            logger.exception('Publishing invalidation events failed')
+
+    def ensure_listener(self):
+        # One listener per process, started on first use so a forked
+        # worker starts its own (see app.activity for the same pattern)
+        if self.backend is None or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.origin = uuid.uuid4().hex
+            threading.Thread(target=self._listen, name='invalidation-bus', daemon=True).start()
+
+    def _listen(self):
+        self.backend.listen(self._receive, self.reset)
+
+    def _receive(self, message):
+        if message.get('origin') == self.origin:
+            return  # already applied when published
+        try:
+            if message.get('reset'):
+                self.reset()
+            else:
+                self.received += len(message['events'])
+                self.apply(message['events'])
+        except Exception:
+            logger.exception('Applying invalidation events failed')
+
+    def stats(self):
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'published': self.published,
+            'received': self.received,
+            'resets': self.resets,
+        }
+
+bus = InvalidationBus()
+
+def notify(kind, *args):
+    """
+    Queue an invalidation event for the current transaction. It is applied
+    and broadcast when the transaction commits.
+    """
+    db.session.info.setdefault('pending_invalidations', []).append((kind, *args))
+
+@event.listens_for(RoutingSession, 'after_commit')
+def publish_pending_invalidations(session):
+    events = session.info.pop('pending_invalidations', None)
+    if events:
+        bus.publish(events)
+
+@event.listens_for(RoutingSession, 'after_soft_rollback')
+def drop_pending_invalidations(session, previous_transaction):
+    session.info.pop('pending_invalidations', None)
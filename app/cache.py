@@ -0,0 +1,236 @@
+import logging
+import threading
+from collections import OrderedDict
+from flask import current_app, jsonify
+from werkzeug.utils import import_string
+from .models import db, Board
+from .streaming import stream_response
+from .bus import bus, notify, BOARD_CHANGED
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend:
+    """
+    Interface for the optional shared cache tier (e.g. Redis or memcached).
+    Set RESPONSE_CACHE_BACKEND to the import path of a subclass; it is
+    constructed with the Flask app. Keys are strings and values are bytes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Shared tier stored in Redis at RESPONSE_CACHE_REDIS_URL. Requires the
+    `redis` package.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        import redis
+        self.client = redis.Redis.from_url(app.config['RESPONSE_CACHE_REDIS_URL'])
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=ttl)
+
+class LRUCache:
+    """
+    Bounded, thread-safe in-process cache. Counts hits, misses, capacity
+    evictions and explicit invalidations.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, predicate):
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+class ResponseCache:
+    """
+    Two-tier cache of serialized read responses. Keys are tuples of
+    (kind, board_id, board_version, ...), so a write only has to bump the
+    board's version for every cached response of that board to go stale.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.local = None
+        self.shared = None
+        self.shared_ttl = None
+        self.shared_stats = {'hits': 0, 'misses': 0, 'errors': 0}
+
+    def init_app(self, app):
+        self.enabled = app.config['RESPONSE_CACHE_ENABLED']
+        self.max_entry_bytes = app.config['RESPONSE_CACHE_MAX_ENTRY_BYTES']
+        self.local = LRUCache(app.config['RESPONSE_CACHE_SIZE'])
+        backend = app.config.get('RESPONSE_CACHE_BACKEND')
+        if backend:
+            self.shared = import_string(backend)(app)
+            self.shared_ttl = app.config['RESPONSE_CACHE_TTL']
+
+    @staticmethod
+    def _shared_key(key):
+        return 'taskflow:response:' + ':'.join(str(part) for part in key)
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+        try:
+            value = self.shared.get(self._shared_key(key))
+        except Exception:
+            self.shared_stats['errors'] += 1
+            logger.exception('Shared response cache read failed')
+            return None
+        if value is None:
+            self.shared_stats['misses'] += 1
+            return None
+        self.shared_stats['hits'] += 1
+        self.local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        if not self.enabled or len(value) > self.max_entry_bytes:
+            return
+        self.local.set(key, value)
+        if self.shared is not None:
+            try:
+                self.shared.set(self._shared_key(key), value, self.shared_ttl)
+            except Exception:
+                self.shared_stats['errors'] += 1
+                logger.exception('Shared response cache write failed')
+
+    def discard_board(self, board_id):
+        """
+        Free the local entries of a board. Not needed for correctness (the
+        version bump already makes them unreachable), it only returns memory.
+        """
+        if self.enabled:
+            self.local.discard(lambda key: key[1] == board_id)
+
+    def stats(self):
+        stats = {'enabled': self.enabled, 'local': self.local.stats() if self.local else None}
+        if self.shared is not None:
+            stats['shared'] = dict(self.shared_stats, backend=type(self.shared).__name__)
+        return stats
+
+response_cache = ResponseCache()
+bus.subscribe(BOARD_CHANGED, response_cache.discard_board)
+
+def invalidate_board(board_id):
+    """
+    Bump a board's version inside the current transaction so cached
+    responses for it are no longer served once the change commits.
+    """
+    db.session.execute(
+        db.update(Board).where(Board.id == board_id).values(version=Board.version + 1)
+    )
+    # Other processes free their entries for the board too
+    notify(BOARD_CHANGED, board_id)
+
+def cached_response(key, build):
+    """
+    Return the cached JSON response for key, or call build() for the payload,
+    cache its serialized form and return it.
+    """
+    if db.session.info.get('defer_commit'):
+        # Inside a batch the session may hold uncommitted changes that could
+        # still be rolled back, so neither serve nor store cached responses
+        return jsonify(build())
+
+    body = response_cache.get(key)
+    if body is not None:
+        response = current_app.response_class(body, mimetype=current_app.json.mimetype)
+        response.headers['X-Cache'] = 'HIT'
+        return response
+
+    response = jsonify(build())
+    response_cache.set(key, response.get_data())
+    response.headers['X-Cache'] = 'MISS'
+    return response
+
+def cached_stream(key, build):
+    """
+    Like cached_response, for payloads too large to build in memory:
+    build() returns an iterator of JSON text chunks (see
+    app.streaming.json_array) that is streamed to the client. The body is
+    stored in the cache once fully sent, unless it grew past
+    RESPONSE_CACHE_MAX_ENTRY_BYTES, at which point collecting it stops.
+    """
+    if db.session.info.get('defer_commit'):
+        # See cached_response
+        return stream_response(build())
+
+    body = response_cache.get(key)
+    if body is not None:
+        response = current_app.response_class(body, mimetype=current_app.json.mimetype)
+        response.headers['X-Cache'] = 'HIT'
+        return response
+
+    def fill(chunks):
+        parts, size = [], 0
+        for chunk in chunks:
+            chunk = chunk.encode()
+            if parts is not None:
+                size += len(chunk)
+                if size > response_cache.max_entry_bytes:
+                    parts = None
+                else:
+                    parts.append(chunk)
+            yield chunk
+        if parts is not None:
+            response_cache.set(key, b''.join(parts))
+
+    response = stream_response(fill(build()) if response_cache.enabled else build())
+    response.headers['X-Cache'] = 'MISS'
+    return response
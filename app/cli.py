@@ -0,0 +1,86 @@
+import os
+import click
+from .models import db
+from . import counters
+from .provisioning import parse_users, provision_users
+from .seed import parse_range, seed
+from .sharding import prepare_shards, sync_users, shard_count
+
+def _range_option(ctx, param, value):
+    try:
+        return parse_range(value)
+    except ValueError:
+        raise click.BadParameter("expected a count like '5' or a range like '3-8'")
+
+def register_commands(app):
+    """
+    Register the application's `flask` CLI commands.
+    """
+
+    @app.cli.command('recount-board-stats')
+    @click.option('--board-id', 'board_ids', type=int, multiple=True,
+                  help='Only recount these boards (repeatable). Defaults to all boards.')
+    def recount_board_stats(board_ids):
+        """Rebuild the list and card counters used by the board stats endpoint."""
+        counters.recount(list(board_ids) or None)
+        db.session.commit()
+        click.echo('Board counters recomputed')
+
+    @app.cli.command('provision-users')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'json']),
+                  help='Input format. Defaults to the file extension.')
+    @click.option('--workers', type=int, default=None,
+                  help='Password hashing processes. Defaults to one per CPU.')
+    @click.option('--batch-size', type=int, default=None,
+                  help='Users per INSERT. Defaults to PROVISION_BATCH_SIZE.')
+    def provision_users_command(path, fmt, workers, batch_size):
+        """Create users in bulk from a CSV or JSON file (username, email, password, is_admin)."""
+        fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+        with open(path, encoding='utf-8') as f:
+            records, error = parse_users(f.read(), fmt)
+        if error:
+            raise click.ClickException(error)
+
+        result = provision_users(
+            records,
+            workers=workers or app.config['PROVISION_HASH_WORKERS'],
+            batch_size=batch_size or app.config['PROVISION_BATCH_SIZE']
+        )
+        db.session.commit()
+
+        click.echo(f"Created {result['created']} users, skipped {len(result['skipped'])}")
+        for entry in result['skipped']:
+            click.echo(f"  record {entry['index']}: {entry['reason']}")
+
+    @app.cli.command('seed')
+    @click.option('--seed', 'seed_value', type=int, default=0, show_default=True,
+                  help='Random seed. The same seed and options always generate the same data.')
+    @click.option('--users', type=int, default=100, show_default=True)
+    @click.option('--boards', type=int, default=1000, show_default=True)
+    @click.option('--cards', type=int, default=100000, show_default=True, help='Total cards across all boards.')
+    @click.option('--lists-per-board', default='3-8', show_default=True, callback=_range_option)
+    @click.option('--members-per-board', default='1-4', show_default=True, callback=_range_option)
+    @click.option('--card-skew', type=float, default=1.16, show_default=True,
+                  help='Pareto shape of the cards-per-list spread. Lower is more skewed, 0 is even.')
+    @click.option('--description-ratio', type=float, default=0.3, show_default=True,
+                  help='Share of cards with a description.')
+    @click.option('--prefix', default='seed', show_default=True, help='Username prefix for generated users.')
+    @click.option('--password', default='password', show_default=True, help='Password of every generated user.')
+    @click.option('--batch-size', type=int, default=5000, show_default=True, help='Rows per INSERT or COPY.')
+    @click.option('--copy/--no-copy', 'use_copy', default=True, show_default=True,
+                  help='Load with COPY on PostgreSQL.')
+    def seed_command(seed_value, use_copy, **options):
+        """Fill the database with generated users, boards, lists and cards."""
+        try:
+            counts = seed(seed_value, use_copy=use_copy, **options)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(', '.join(f'{count} {name}' for name, count in counts.items()))
+
+    @app.cli.command('init-shards')
+    def init_shards_command():
+        """Create the tables on every shard in SHARD_DATABASE_URLS and copy the users to them."""
+        prepare_shards(app)
+        copied = sync_users()
+        click.echo(f'{shard_count()} shards ready, copied {copied} users')
@@ -0,0 +1,41 @@
+from flask import request, jsonify
+
+def expected_version(data=None):
+    """
+    The version the client based its write on, from an If-Match header
+    (ETag form, e.g. "3") or a 'version' field in the body. Returns
+    (version or None, error message or None).
+    """
+    header = request.headers.get('If-Match')
+    if header:
+        value = header.strip()
+        if value.startswith('W/'):
+            value = value[2:]
+        value = value.strip('"')
+    elif isinstance(data, dict) and 'version' in data:
+        value = data['version']
+    else:
+        return None, None
+
+    try:
+        return int(value), None
+    except (TypeError, ValueError):
+        return None, 'Version must be an integer'
+
+def with_etag(response, obj):
+    response.headers['ETag'] = f'"{obj.version}"'
+    return response
+
+def conflict_response(current):
+    """
+    409 carrying the current state of the row (or list of rows) the client
+    is out of date on.
+    """
+    if isinstance(current, list):
+        state = [obj.to_dict() for obj in current]
+    else:
+        state = current.to_dict()
+    return jsonify({
+        'message': 'Version conflict, the resource was modified by someone else',
+        'current': state
+    }), 409
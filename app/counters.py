@@ -0,0 +1,78 @@
+from .models import db, Board, List, Card
+
+def card_added(list_id, board_id, count=1):
+    """
+    Add count cards to the counters of a list and its board. Runs as a
+    single UPDATE per row inside the caller's transaction.
+    """
+    db.session.execute(
+        db.update(List).where(List.id == list_id).values(card_count=List.card_count + count)
+    )
+    db.session.execute(
+        db.update(Board).where(Board.id == board_id).values(card_count=Board.card_count + count)
+    )
+
+def card_removed(list_id, board_id, count=1):
+    card_added(list_id, board_id, -count)
+
+def card_moved(from_list_id, to_list_id):
+    if from_list_id == to_list_id:
+        return
+    db.session.execute(
+        db.update(List).where(List.id == from_list_id).values(card_count=List.card_count - 1)
+    )
+    db.session.execute(
+        db.update(List).where(List.id == to_list_id).values(card_count=List.card_count + 1)
+    )
+
+def list_added(board_id):
+    db.session.execute(
+        db.update(Board).where(Board.id == board_id).values(list_count=Board.list_count + 1)
+    )
+
+def list_removed(list_id, board_id):
+    """
+    Drop a list, and the cards it still holds, from its board's counters.
+    Must run before the list row is deleted.
+    """
+    list_cards = db.select(List.card_count).where(List.id == list_id).scalar_subquery()
+    db.session.execute(
+        db.update(Board).where(Board.id == board_id).values(
+            list_count=Board.list_count - 1,
+            card_count=Board.card_count - list_cards
+        )
+    )
+
+def recount(board_ids=None):
+    """
+    Recompute list and board counters from the card and list tables with
+    GROUP BY queries. Limited to board_ids when given, otherwise every board.
+    """
+    list_filter = List.board_id.in_(board_ids) if board_ids else db.true()
+    board_filter = Board.id.in_(board_ids) if board_ids else db.true()
+
+    list_cards = db.select(Card.list_id, db.func.count().label('n')).group_by(Card.list_id).subquery()
+    board_cards = db.select(Card.board_id, db.func.count().label('n')).group_by(Card.board_id).subquery()
+    board_lists = db.select(List.board_id, db.func.count().label('n')).group_by(List.board_id).subquery()
+
+    options = {'synchronize_session': False}
+    db.session.execute(db.update(List).where(list_filter).values(card_count=0), execution_options=options)
+    db.session.execute(
+        db.update(List).where(list_filter, List.id == list_cards.c.list_id)
+        .values(card_count=list_cards.c.n),
+        execution_options=options
+    )
+    db.session.execute(
+        db.update(Board).where(board_filter).values(card_count=0, list_count=0),
+        execution_options=options
+    )
+    db.session.execute(
+        db.update(Board).where(board_filter, Board.id == board_cards.c.board_id)
+        .values(card_count=board_cards.c.n),
+        execution_options=options
+    )
+    db.session.execute(
+        db.update(Board).where(board_filter, Board.id == board_lists.c.board_id)
+        .values(list_count=board_lists.c.n),
+        execution_options=options
+    )
@@ -0,0 +1,71 @@
+from datetime import datetime
+from .models import db, User, Board, List, Card
+from .sharding import directory_add
+
+# Columns copied verbatim from the source board's lists and cards
+# (list card_count is recounted after the copy)
+LIST_COLUMNS = ('title', 'position', 'card_count')
+CARD_COLUMNS = ('title', 'description', 'position')
+
+def copy_board(source_id, title, user_id):
+    """
+    Create a board owned by user_id holding a copy of every list and card
+    on the source board. The lists (a handful per board) are read once and
+    inserted as new rows, which gives each copy's id for its original.
+    Cards are copied with a single INSERT ... SELECT, pointed at their new
+    lists with a CASE over the old list ids. Returns the new board. The
+    caller commits.
+
+    The copy goes on the source board's shard, which must be the current
+    one, since INSERT ... SELECT cannot cross databases.
+    """
+    board = Board(title=title, created_by=user_id)
+    board.members.append(db.session.get(User, user_id))
+    db.session.add(board)
+    db.session.flush()
+    directory_add(user_id, board.id)
+
+    sources = db.session.execute(
+        db.select(List.id, *(getattr(List, name) for name in LIST_COLUMNS))
+        .where(List.board_id == source_id)
+        .order_by(List.id)
+    ).all()
+    copies = {
+        source.id: List(board_id=board.id, **{name: getattr(source, name) for name in LIST_COLUMNS})
+        for source in sources
+    }
+    db.session.add_all(copies.values())
+    db.session.flush()
+    list_ids = {old_id: copy.id for old_id, copy in copies.items()}
+
+    copied_cards = 0
+    if list_ids:
+        now = db.literal(datetime.utcnow(), db.DateTime)
+        # Only cards of the lists read above: a list added to the source
+        # since then has no copy
+        copied_cards = db.session.execute(
+            db.insert(Card).from_select(
+                ('list_id', 'board_id', *CARD_COLUMNS, 'created_at', 'updated_at'),
+                db.select(
+                    db.case(list_ids, value=Card.list_id),
+                    db.literal(board.id),
+                    *(getattr(Card, name) for name in CARD_COLUMNS),
+                    now,
+                    now
+                ).where(Card.board_id == source_id, Card.list_id.in_(list_ids))
+            )
+        ).rowcount
+        # Cards added to the source lists meanwhile may or may not have been
+        # copied, so count what the copies actually hold
+        db.session.execute(
+            db.update(List)
+            .where(List.board_id == board.id)
+            .values(card_count=db.select(db.func.count()).where(Card.list_id == List.id).scalar_subquery()),
+            execution_options={'synchronize_session': False}
+        )
+        for copy in copies.values():
+            db.session.expire(copy, ['card_count'])
+
+    board.list_count = len(copies)
+    board.card_count = copied_cards
+    return board
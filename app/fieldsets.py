@@ -0,0 +1,101 @@
+from sqlalchemy.orm import load_only, selectinload
+from .models import Board, List, Card, User
+
+# Resource types that can be narrowed with fields / fields[<type>]
+MODELS = {
+    'board': Board,
+    'list': List,
+    'card': Card,
+    'user': User,
+}
+
+# Relationships that can be named in ?include=, per primary resource type
+BOARD_INCLUDES = ('lists', 'cards', 'members')
+LIST_INCLUDES = ('cards',)
+
+class Fieldset:
+    """
+    The fields requested for each resource type and the relationships to
+    include in a read. Models serialize through it (to_dict(fieldset)) and
+    the *_load_options helpers turn it into loader options, so fields and
+    relationships that are not requested are never read from the database.
+    """
+
+    def __init__(self, fields, include):
+        self._fields = fields
+        self._include = frozenset(include)
+
+    def fields(self, type_):
+        model = MODELS[type_]
+        return self._fields.get(type_, getattr(model, 'SUMMARY_FIELDS', model.FIELDS))
+
+    def includes(self, name):
+        return name in self._include
+
+    def columns(self, type_):
+        model = MODELS[type_]
+        return [getattr(model, field) for field in self.fields(type_)]
+
+    @property
+    def key(self):
+        """Hashable form used in response cache keys."""
+        return (tuple(sorted(self._fields.items())), tuple(sorted(self._include)))
+
+def parse_fieldset(args, primary_type, allowed_includes=()):
+    """
+    Read ?fields=, ?fields[<type>]= and ?include= from the query string.
+    Without include every allowed relationship is embedded, as before.
+    Returns (fieldset, None) or (None, error message).
+    """
+    fields = {}
+    for key, value in args.items():
+        if key == 'fields':
+            type_ = primary_type
+        elif key.startswith('fields[') and key.endswith(']'):
+            type_ = key[len('fields['):-1]
+        else:
+            continue
+
+        if type_ not in MODELS:
+            return None, f"Unknown resource type '{type_}'"
+        names = tuple(name.strip() for name in value.split(',') if name.strip())
+        unknown = [name for name in names if name not in MODELS[type_].FIELDS]
+        if unknown:
+            return None, f"Unknown {type_} field(s): {', '.join(unknown)}"
+        fields[type_] = names
+
+    if 'include' in args:
+        include = {name.strip() for name in args['include'].split(',') if name.strip()}
+        unknown = include - set(allowed_includes)
+        if unknown:
+            return None, f"Cannot include: {', '.join(sorted(unknown))}"
+        # Cards are nested inside lists on a board
+        if 'cards' in include and 'lists' in allowed_includes:
+            include.add('lists')
+    else:
+        include = set(allowed_includes)
+
+    return Fieldset(fields, include), None
+
+def card_load_options(fieldset, *extra):
+    # Any unrequested column (and Card.description unless named) stays deferred
+    return [load_only(*fieldset.columns('card'), Card.list_id, *extra)]
+
+def list_load_options(fieldset, *extra):
+    options = [load_only(*fieldset.columns('list'), List.board_id, *extra)]
+    if fieldset.includes('cards'):
+        options.append(
+            selectinload(List.cards).load_only(*fieldset.columns('card'), Card.list_id)
+        )
+    return options
+
+def board_load_options(fieldset):
+    options = [load_only(*fieldset.columns('board'), Board.version)]
+    if fieldset.includes('lists'):
+        lists = selectinload(Board.lists).load_only(*fieldset.columns('list'), List.board_id)
+        if fieldset.includes('cards'):
+            lists = lists.selectinload(List.cards).load_only(*fieldset.columns('card'), Card.list_id)
+        options.append(lists)
+    if fieldset.includes('members'):
+        options.append(selectinload(Board.members).load_only(*fieldset.columns('user')))
+    return options
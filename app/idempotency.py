@@ -0,0 +1,144 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, request, jsonify
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from .models import db, IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+def _fingerprint():
+    # The same key must come with the same request
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+def _claim(user_id, key, fingerprint):
+    """
+    Insert an in-progress row for the key. Returns (True, None) when this
+    request now owns the key, or (False, row) with the existing row.
+    """
+    now = datetime.utcnow()
+    lock_timeout = timedelta(seconds=current_app.config['IDEMPOTENCY_LOCK_TIMEOUT'])
+    # Drop the user's expired keys, and in-progress claims whose request
+    # died before finishing, so their keys can be used again
+    IdempotencyKey.query.filter(
+        IdempotencyKey.user_id == user_id,
+        db.or_(
+            IdempotencyKey.expires_at < now,
+            db.and_(IdempotencyKey.status_code.is_(None), IdempotencyKey.created_at < now - lock_timeout)
+        )
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+    # The other request can give the key up between our insert and our
+    # read, so try twice. An insert that fails with no row for the key in
+    # the way broke some other constraint (e.g. the user is gone): re-raise.
+    for attempt in range(2):
+        db.session.add(IdempotencyKey(
+            user_id=user_id,
+            key=key,
+            request_hash=fingerprint,
+            created_at=now,
+            expires_at=now + timedelta(seconds=current_app.config['IDEMPOTENCY_KEY_TTL'])
+        ))
+        try:
+            # Committed on its own so concurrent requests with the key see it
+            db.session.commit()
+            return True, None
+        except IntegrityError as e:
+            db.session.rollback()
+            error = e
+        row = _load(user_id, key)
+        if row is not None:
+            return False, row
+    raise error
+
+def _load(user_id, key):
+    # Column values rather than the entity, so polling never reads a stale identity map
+    row = db.session.execute(
+        db.select(IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.response_body)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    ).first()
+    db.session.rollback()
+    return row
+
+def _wait(user_id, key):
+    """
+    Poll a key another request is working on until its response is stored.
+    Returns the row, or None if it disappeared (the other request failed)
+    or IDEMPOTENCY_WAIT_TIMEOUT passed with the row still in progress.
+    """
+    deadline = time.monotonic() + current_app.config['IDEMPOTENCY_WAIT_TIMEOUT']
+    while time.monotonic() < deadline:
+        time.sleep(current_app.config['IDEMPOTENCY_POLL_INTERVAL'])
+        row = _load(user_id, key)
+        if row is None or row.status_code is not None:
+            return row
+    return _load(user_id, key)
+
+def _replay(row):
+    response = current_app.response_class(row.response_body, status=row.status_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def _release(user_id, key):
+    db.session.rollback()
+    IdempotencyKey.query.filter_by(user_id=user_id, key=key).delete(synchronize_session=False)
+    db.session.commit()
+
+def idempotent(view):
+    """
+    Make a create endpoint safe to retry. A request with an Idempotency-Key
+    header runs once per user and key; its response is stored for
+    IDEMPOTENCY_KEY_TTL seconds and replayed for later requests with the
+    same key, and a request arriving while the first is still running
+    waits for its response. Only successful responses are kept, so a
+    failed request can be retried with the same key. Goes under
+    @jwt_required().
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        # Batch operations share one transaction, which a claim would commit
+        if key is None or db.session.info.get('defer_commit'):
+            return view(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({'message': f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters'}), 400
+
+        user_id = get_jwt_identity()
+        fingerprint = _fingerprint()
+        owned, row = _claim(user_id, key, fingerprint)
+        if not owned and row.request_hash == fingerprint and row.status_code is None:
+            row = _wait(user_id, key)
+            if row is None:
+                # The first request failed and gave the key up; take it over
+                owned, row = _claim(user_id, key, fingerprint)
+        if not owned:
+            if row.request_hash != fingerprint:
+                return jsonify({'message': f'{HEADER} was already used for a different request'}), 422
+            if row.status_code is None:
+                response = jsonify({'message': f'A request with this {HEADER} is still in progress'})
+                response.headers['Retry-After'] = '1'
+                return response, 409
+            return _replay(row)
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            _release(user_id, key)
+            raise
+
+        if 200 <= response.status_code < 300:
+            IdempotencyKey.query.filter_by(user_id=user_id, key=key).update({
+                'status_code': response.status_code,
+                'response_body': response.get_data(as_text=True)
+            }, synchronize_session=False)
+            db.session.commit()
+        else:
+            _release(user_id, key)
+        return response
+    return wrapper
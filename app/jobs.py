@@ -0,0 +1,263 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event
+from werkzeug.utils import import_string
+from .models import db, Job
+from .replica import RoutingSession
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+_handlers = {}
+
+def job_handler(kind):
+    """
+    Register a function as the handler for jobs of the given kind. It is
+    called as handler(job, **params) inside an app context, where job is a
+    JobContext, and its return value is stored as the job's result.
+    """
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+class JobCancelled(Exception):
+    pass
+
+class JobContext:
+    """
+    Handed to job handlers so long-running work can honour cancellation.
+    """
+
+    def __init__(self, job_id):
+        self.id = job_id
+
+    def cancelled(self):
+        return bool(db.session.scalar(
+            db.select(Job.cancel_requested).where(Job.id == self.id)
+        ))
+
+    def check_cancelled(self):
+        """
+        Raise JobCancelled if cancellation was requested. Handlers call this
+        between units of work; the job's transaction is rolled back.
+        """
+        if self.cancelled():
+            raise JobCancelled()
+
+class JobBackend:
+    """
+    Interface for where jobs run. Set JOB_BACKEND to the import path of a
+    subclass to hand jobs to an external queue; it is constructed with the
+    Flask app. submit() is called once the job row is committed and must
+    eventually call run_job(app, job_id) in a process that has the app
+    loaded. cancel() is a best-effort hint; the job row is authoritative.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def submit(self, job_id):
+        raise NotImplementedError
+
+    def cancel(self, job_id):
+        pass
+
+class LocalJobBackend(JobBackend):
+    """
+    Runs jobs on a pool of JOB_WORKERS threads in the current process.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.max_workers = app.config['JOB_WORKERS']
+        self._executor = None
+        self._pid = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created on first use in each process, so a pool is never inherited across a fork
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+            self._pid = os.getpid()
+            self._futures = {}
+        return self._executor
+
+    def submit(self, job_id):
+        with self._lock:
+            future = self._get_executor().submit(run_job, self.app, job_id)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._futures.pop(job_id, None))
+
+    def cancel(self, job_id):
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.cancel()
+
+def init_jobs(app):
+    """
+    Set up the job backend configured by JOB_BACKEND (local thread pool by
+    default), and recover jobs left behind by stopped processes when each
+    server process handles its first request.
+    """
+    backend = app.config.get('JOB_BACKEND')
+    app.extensions['jobs'] = import_string(backend)(app) if backend else LocalJobBackend(app)
+
+    recovered = {'pid': None}
+    lock = threading.Lock()
+
+    @app.before_request
+    def start_job_recovery():
+        # Once per process, in the background; not at import time, so CLI
+        # commands (including migrations) never pick jobs up
+        if recovered['pid'] == os.getpid():
+            return
+        with lock:
+            if recovered['pid'] == os.getpid():
+                return
+            recovered['pid'] = os.getpid()
+        threading.Thread(target=recover_jobs, args=(app,), name='job-recovery', daemon=True).start()
+
+def recover_jobs(app):
+    """
+    Hand unfinished jobs back to the backend. A job still running
+    JOB_STALE_AFTER seconds after it started is taken to have died with its
+    process: it is queued again, or cancelled if cancellation was requested.
+    Every queued job is then submitted. Handlers either run in one
+    transaction or pick up where they stopped (delete_board), so running a
+    job again is safe, and run_job's claim keeps a job that several
+    processes submit from running more than once.
+    """
+    with app.app_context():
+        try:
+            now = datetime.utcnow()
+            stale = db.and_(Job.status == RUNNING,
+                            Job.started_at < now - timedelta(seconds=app.config['JOB_STALE_AFTER']))
+            cancelled = db.session.execute(
+                db.update(Job)
+                .where(stale, Job.cancel_requested)
+                .values(status=CANCELLED, finished_at=now),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+            requeued = db.session.execute(
+                db.update(Job)
+                .where(stale)
+                .values(status=QUEUED, started_at=None),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+            db.session.commit()
+            job_ids = db.session.scalars(db.select(Job.id).where(Job.status == QUEUED).order_by(Job.id)).all()
+            db.session.rollback()
+        except Exception:
+            db.session.rollback()
+            logger.exception("Job recovery failed")
+            return
+
+        if cancelled or requeued:
+            logger.warning(f"Recovered stale running jobs: {requeued} queued again, {cancelled} cancelled")
+        for job_id in job_ids:
+            app.extensions['jobs'].submit(job_id)
+        if job_ids:
+            logger.info(f"Submitted {len(job_ids)} queued jobs")
+
+def enqueue(kind, params, user_id=None, board_id=None):
+    """
+    Add a queued job to the session; params are passed to the handler as
+    keyword arguments. It is handed to the backend when the caller commits,
+    so a request that rolls back never starts work.
+    """
+    if kind not in _handlers:
+        raise ValueError(f'Unknown job kind: {kind}')
+
+    job = Job(kind=kind, status=QUEUED, user_id=user_id, board_id=board_id, params=params)
+    db.session.add(job)
+    db.session.flush()
+    db.session.info.setdefault('pending_jobs', []).append(
+        (current_app._get_current_object(), job.id)
+    )
+    return job
+
+@event.listens_for(RoutingSession, 'after_commit')
+def submit_pending_jobs(session):
+    for app, job_id in session.info.pop('pending_jobs', []):
+        app.extensions['jobs'].submit(job_id)
+
+@event.listens_for(RoutingSession, 'after_soft_rollback')
+def drop_pending_jobs(session, previous_transaction):
+    session.info.pop('pending_jobs', None)
+
+def cancel_job(job_id):
+    """
+    Request cancellation. A queued job is cancelled outright; a running one
+    stops at its handler's next check_cancelled(). Returns False if the job
+    had already finished. The caller commits.
+    """
+    now = datetime.utcnow()
+    cancelled = db.session.execute(
+        db.update(Job)
+        .where(Job.id == job_id, Job.status == QUEUED)
+        .values(status=CANCELLED, cancel_requested=True, finished_at=now),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    if cancelled:
+        current_app.extensions['jobs'].cancel(job_id)
+        return True
+
+    return db.session.execute(
+        db.update(Job)
+        .where(Job.id == job_id, Job.status == RUNNING)
+        .values(cancel_requested=True),
+        execution_options={'synchronize_session': False}
+    ).rowcount > 0
+
+def _finish(job_id, status, result=None, error=None):
+    db.session.execute(
+        db.update(Job)
+        .where(Job.id == job_id)
+        .values(status=status, result=result, error=error, finished_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+
+def run_job(app, job_id):
+    """
+    Claim a queued job and run its handler, recording the outcome on the
+    job row. Safe to call from any process: the claim is a conditional
+    UPDATE, so a job runs at most once.
+    """
+    with app.app_context():
+        claimed = db.session.execute(
+            db.update(Job)
+            .where(Job.id == job_id, Job.status == QUEUED)
+            .values(status=RUNNING, started_at=datetime.utcnow()),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return
+
+        job = db.session.get(Job, job_id)
+        kind = job.kind
+        try:
+            result = _handlers[kind](JobContext(job_id), **job.params)
+        except JobCancelled:
+            db.session.rollback()
+            _finish(job_id, CANCELLED)
+            logger.info(f"Job {job_id} ({kind}) cancelled")
+        except Exception as e:
+            db.session.rollback()
+            _finish(job_id, FAILED, error=str(e))
+            logger.exception(f"Job {job_id} ({kind}) failed")
+        else:
+            _finish(job_id, SUCCEEDED, result=result)
@@ -1,8 +1,82 @@
+import sqlite3
+import zlib
 from datetime import datetime
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from werkzeug.security import generate_password_hash, check_password_hash
+from .replica import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, and therefore ON DELETE CASCADE, unless asked
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+# Table info marking tables stored on board shards (see app.sharding).
+# Sharded tables with their own ids are AUTOINCREMENT on SQLite so each
+# shard's id range can be set in sqlite_sequence.
+SHARDED = {'sharded': True}
+
+def serialize(obj, fields):
+    """
+    Build a JSON-ready dict of the given attributes. Only the named
+    attributes are touched, so columns deferred by a sparse fieldset
+    (see app.fieldsets) are never loaded.
+    """
+    data = {}
+    for field in fields:
+        value = getattr(obj, field)
+        data[field] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+class CompressedText(db.TypeDecorator):
+    """
+    Text stored as bytes. Values of at least the configured number of
+    bytes (the config_key setting, 0 to turn it off) are zlib-compressed
+    when that makes them smaller. Stored values starting with a NUL byte
+    carry a format tag; anything else is plain UTF-8, so uncompressed rows,
+    including ones written before compression existed, read back as is.
+    """
+    impl = db.LargeBinary
+    cache_ok = True
+
+    COMPRESSED = b'\x00z'
+    # Plain text that itself starts with a NUL byte
+    ESCAPED = b'\x00p'
+
+    def __init__(self, config_key):
+        super().__init__()
+        self.config_key = config_key
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        data = value.encode('utf-8')
+        min_bytes = current_app.config[self.config_key] if has_app_context() else 0
+        if min_bytes and len(data) >= min_bytes:
+            compressed = zlib.compress(data)
+            if len(compressed) + len(self.COMPRESSED) < len(data):
+                return self.COMPRESSED + compressed
+        if data.startswith(b'\x00'):
+            return self.ESCAPED + data
+        return data
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            # SQLite keeps rows stored as TEXT before the column held bytes
+            return value
+        value = bytes(value)
+        if value.startswith(self.COMPRESSED):
+            return zlib.decompress(value[len(self.COMPRESSED):]).decode('utf-8')
+        if value.startswith(self.ESCAPED):
+            value = value[len(self.ESCAPED):]
+        return value.decode('utf-8')
 
 class User(db.Model):
     __tablename__ = 'user'
@@ -10,7 +84,12 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
-    boards = db.relationship('Board', secondary='user_board', back_populates='members')
+    # Admins can provision users in bulk (POST /api/admin/users)
+    is_admin = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    boards = db.relationship('Board', secondary='user_board', back_populates='members', passive_deletes=True)
+
+    # Copied to every shard (see app.sharding); written only on the primary
+    __table_args__ = {'info': SHARDED}
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -18,70 +97,150 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email
-        }
+    # Fields returned by to_dict unless a fieldset narrows them
+    FIELDS = ('id', 'username', 'email')
+
+    def to_dict(self, fieldset=None):
+        return serialize(self, fieldset.fields('user') if fieldset else self.FIELDS)
 
     @classmethod
     def delete_by_username(cls, username):
-        user = cls.query.filter_by(username=username).first()
-        if user:
-            db.session.delete(user)
-            db.session.commit()
-            return True
-        return False
+        from .sharding import delete_replicated_users
+        # Board memberships are removed by the database (ON DELETE CASCADE)
+        user_ids = db.session.execute(db.select(cls.id).filter_by(username=username)).scalars().all()
+        delete_replicated_users(user_ids)
+        deleted = cls.query.filter_by(username=username).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted > 0
 
 class Board(db.Model):
     __tablename__ = 'board'
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    lists = db.relationship('List', backref='board', lazy=True, cascade="all, delete-orphan")
-    members = db.relationship('User', secondary='user_board', back_populates='boards')
+    # Maintained by app.counters; rebuilt with `flask recount-board-stats`
+    list_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    card_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped by every change to the board or its lists, cards and members; keys the response cache
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    # Template boards can be duplicated by any user
+    is_template = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    # Only the creator (or an admin) can make the board a template
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'))
+    lists = db.relationship('List', backref='board', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    members = db.relationship('User', secondary='user_board', back_populates='boards', passive_deletes=True)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'created_at': self.created_at.isoformat(),
-            'lists': [list.to_dict() for list in self.lists],
-            'members': [member.to_dict() for member in self.members]
-        }
+    __table_args__ = {'info': SHARDED, 'sqlite_autoincrement': True}
+
+    FIELDS = ('id', 'title', 'created_at', 'list_count', 'card_count', 'is_template')
+
+    def to_dict(self, fieldset=None):
+        data = serialize(self, fieldset.fields('board') if fieldset else self.FIELDS)
+        if fieldset is None or fieldset.includes('lists'):
+            data['lists'] = [list.to_dict(fieldset) for list in self.lists]
+        if fieldset is None or fieldset.includes('members'):
+            data['members'] = [member.to_dict(fieldset) for member in self.members]
+        return data
 
 class UserBoard(db.Model):
     __tablename__ = 'user_board'
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
-    board_id = db.Column(db.Integer, db.ForeignKey('board.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    board_id = db.Column(db.Integer, db.ForeignKey('board.id', ondelete='CASCADE'), primary_key=True)
+
+    # The primary key leads with user_id, so lookups by board need their own index
+    __table_args__ = (
+        db.Index('ix_user_board_board_id', 'board_id'),
+        {'info': SHARDED}
+    )
 
 class List(db.Model):
     __tablename__ = 'list'
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    board_id = db.Column(db.Integer, db.ForeignKey('board.id'), nullable=False)
-    cards = db.relationship('Card', backref='list', lazy=True, cascade="all, delete-orphan")
+    board_id = db.Column(db.Integer, db.ForeignKey('board.id', ondelete='CASCADE'), nullable=False)
+    cards = db.relationship('Card', backref='list', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
     position = db.Column(db.Integer, nullable=False, default=0)
+    # Maintained by app.counters; rebuilt with `flask recount-board-stats`
+    card_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Incremented on every ORM update; updates fail with StaleDataError if it moved
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'board_id': self.board_id,
-            'position': self.position,
-            'cards': [card.to_dict() for card in self.cards]
-        }
+    # Serves get_lists (position, id) ordering and paging and the MAX(position) lookup in create_list
+    __table_args__ = (
+        db.Index('ix_list_board_id_position', 'board_id', 'position', 'id'),
+        {'info': SHARDED, 'sqlite_autoincrement': True}
+    )
+
+    __mapper_args__ = {'version_id_col': version}
+
+    FIELDS = ('id', 'title', 'board_id', 'position', 'card_count', 'version')
+
+    def to_dict(self, fieldset=None):
+        data = serialize(self, fieldset.fields('list') if fieldset else self.FIELDS)
+        if fieldset is None:
+            data['cards'] = [card.to_summary_dict() for card in self.cards]
+        elif fieldset.includes('cards'):
+            data['cards'] = [card.to_dict(fieldset) for card in self.cards]
+        return data
 
 class Card(db.Model):
     __tablename__ = 'card'
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text)
-    list_id = db.Column(db.Integer, db.ForeignKey('list.id'), nullable=False)
+    # Deferred: only loaded when read (get_card) or asked for with load_only
+    # (fields[card]=...,description), so list and board reads skip it
+    description = db.deferred(db.Column(CompressedText('DESCRIPTION_COMPRESS_MIN_BYTES')))
+    list_id = db.Column(db.Integer, db.ForeignKey('list.id', ondelete='CASCADE'), nullable=False)
+    # Denormalized from the list so card access can be checked in a single query
+    board_id = db.Column(db.Integer, db.ForeignKey('board.id', ondelete='CASCADE'), nullable=False, index=True)
     position = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Incremented on every ORM update; updates fail with StaleDataError if it moved
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    # Serves get_cards (position, id) ordering and paging and the MAX(position) lookup in create_card
+    __table_args__ = (
+        db.Index('ix_card_list_id_position', 'list_id', 'position', 'id'),
+        {'info': SHARDED, 'sqlite_autoincrement': True}
+    )
+
+    __mapper_args__ = {'version_id_col': version}
+
+    FIELDS = ('id', 'title', 'description', 'list_id', 'board_id', 'position', 'created_at', 'updated_at', 'version')
+    # Fields of cards in lists and boards unless a fieldset asks for others
+    SUMMARY_FIELDS = tuple(field for field in FIELDS if field != 'description')
+
+    def to_dict(self, fieldset=None):
+        return serialize(self, fieldset.fields('card') if fieldset else self.FIELDS)
+
+    def to_summary_dict(self):
+        return serialize(self, self.SUMMARY_FIELDS)
+
+class ArchivedCard(db.Model):
+    """
+    Cold storage for archived cards. Rows are moved here from `card` in bulk
+    (see app.archive) and keep their original id so they can be restored.
+    """
+    __tablename__ = 'archived_card'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(200), nullable=False)
+    # Same storage as card.description, so rows are copied between them as is
+    description = db.Column(CompressedText('DESCRIPTION_COMPRESS_MIN_BYTES'))
+    list_id = db.Column(db.Integer, db.ForeignKey('list.id', ondelete='CASCADE'), nullable=False, index=True)
+    board_id = db.Column(db.Integer, db.ForeignKey('board.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    # Carried over so a restored card keeps rejecting updates based on older versions
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Serves the per-board archive listing, newest first
+    __table_args__ = (
+        db.Index('ix_archived_card_board_id_archived_at', 'board_id', 'archived_at'),
+        {'info': SHARDED}
+    )
 
     def to_dict(self):
         return {
@@ -89,7 +248,103 @@ class Card(db.Model):
             'title': self.title,
             'description': self.description,
             'list_id': self.list_id,
+            'board_id': self.board_id,
             'position': self.position,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'version': self.version,
+            'archived_at': self.archived_at.isoformat()
         }
+
+class Job(db.Model):
+    """
+    Background work run by app.jobs. The row is the source of truth for a
+    job's status, so any worker process can report on it.
+    """
+    __tablename__ = 'job'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), index=True)
+    # Not a foreign key: a board deletion job outlives its board
+    board_id = db.Column(db.Integer)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    FIELDS = ('id', 'kind', 'status', 'board_id', 'result', 'error', 'cancel_requested',
+              'created_at', 'started_at', 'finished_at')
+
+    def to_dict(self):
+        return serialize(self, self.FIELDS)
+
+class Activity(db.Model):
+    """
+    An entry in a board's activity feed. Rows are written in batches by
+    app.activity, some time after the change they describe.
+    """
+    __tablename__ = 'activity'
+    id = db.Column(db.Integer, primary_key=True)
+    board_id = db.Column(db.Integer, db.ForeignKey('board.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'))
+    action = db.Column(db.String(50), nullable=False)  # e.g. 'card.moved'
+    target_id = db.Column(db.Integer)  # id of the card, list or user acted on
+    data = db.Column(db.JSON, nullable=False, default=dict)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Serves the per-board feed, newest first
+    __table_args__ = (
+        db.Index('ix_activity_board_id_id', 'board_id', 'id'),
+        {'info': SHARDED, 'sqlite_autoincrement': True}
+    )
+
+    FIELDS = ('id', 'board_id', 'user_id', 'action', 'target_id', 'data', 'created_at')
+
+    def to_dict(self):
+        return serialize(self, self.FIELDS)
+
+class RevokedToken(db.Model):
+    """
+    An access token revoked before it expired (see POST /api/auth/logout).
+    Rows can be deleted once expires_at has passed.
+    """
+    __tablename__ = 'revoked_token'
+    jti = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class IdempotencyKey(db.Model):
+    """
+    The outcome of a create request sent with an Idempotency-Key header
+    (see app.idempotency). status_code stays NULL while the first request
+    is running. Rows can be deleted once expires_at has passed.
+    """
+    __tablename__ = 'idempotency_key'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    # Hash of the method, path and body the key was first used with
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class BoardDirectory(db.Model):
+    """
+    Which boards each user belongs to, kept on the primary database next to
+    the users so a user's boards can be found without asking every shard.
+    Mirrors user_board, which lives on each board's shard (app.sharding).
+    """
+    __tablename__ = 'board_directory'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    # Not a foreign key: the board may be on another database
+    board_id = db.Column(db.Integer, primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_board_directory_board_id', 'board_id'),
+    )
@@ -0,0 +1,86 @@
+import base64
+import binascii
+import json
+from flask import current_app
+from sqlalchemy import tuple_
+
+def encode_cursor(*values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, length):
+    """
+    Decode a cursor produced by encode_cursor into a list of `length`
+    integers. Raises ValueError for anything else.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if (not isinstance(values, list) or len(values) != length
+            or not all(isinstance(v, int) and not isinstance(v, bool) for v in values)):
+        raise ValueError('Invalid cursor')
+    return values
+
+class Page:
+    """
+    Keyset page request over an ordering of (position, id), or of any
+    other integer columns. Rows after the cursor are selected with a
+    row-value comparison that the (parent_id, position, id) indexes serve
+    directly, so pages stay stable when rows are inserted before the cursor.
+    """
+
+    def __init__(self, limit, after):
+        self.limit = limit
+        self.after = after
+
+    @property
+    def key(self):
+        return (self.limit, tuple(self.after) if self.after else None)
+
+    def apply(self, query, *columns, descending=False):
+        """
+        Limit a query already ordered by columns (descending when the page
+        walks newest first) to this page.
+        """
+        if self.after:
+            key, cursor = tuple_(*columns), tuple_(*self.after)
+            query = query.filter(key < cursor if descending else key > cursor)
+        # One extra row tells us whether there is a next page
+        return query.limit(self.limit + 1)
+
+    def split(self, rows, key=lambda row: (row.position, row.id)):
+        """Return (rows of this page, cursor of the next page or None)."""
+        if len(rows) <= self.limit:
+            return rows, None
+        rows = rows[:self.limit]
+        return rows, encode_cursor(*key(rows[-1]))
+
+def parse_page(args, key_length=2, required=False):
+    """
+    Read ?limit= and ?cursor= from the query string. Pagination is opt-in
+    unless required: returns (None, None) when neither is given, otherwise
+    (Page, None) or (None, error message), e.g. for a limit that is not an
+    integer from 1 to PAGE_SIZE_MAX.
+    """
+    if not required and 'limit' not in args and 'cursor' not in args:
+        return None, None
+
+    limit = current_app.config['PAGE_SIZE_DEFAULT']
+    maximum = current_app.config['PAGE_SIZE_MAX']
+    if 'limit' in args:
+        try:
+            limit = int(args['limit'])
+        except ValueError:
+            limit = None
+        if limit is None or not 1 <= limit <= maximum:
+            return None, f'limit must be an integer from 1 to {maximum}'
+
+    after = None
+    if args.get('cursor'):
+        try:
+            after = decode_cursor(args['cursor'], key_length)
+        except ValueError as e:
+            return None, str(e)
+
+    return Page(limit, after), None
@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash
+from .models import db, User
+from .sharding import replicate_users
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ('username', 'email', 'password')
+
+# Below this many passwords, starting a process pool costs more than it saves
+POOL_THRESHOLD = 8
+
+def parse_users(text, fmt):
+    """
+    Read user records from CSV (a header row naming username, email,
+    password and optionally is_admin) or JSON (an array of objects, or
+    {"users": [...]}). Returns (records, None) or (None, error message).
+    """
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(text))), None
+
+    if fmt == 'json':
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return None, 'Invalid JSON'
+        if isinstance(data, dict):
+            data = data.get('users')
+        if not isinstance(data, list) or not all(isinstance(record, dict) for record in data):
+            return None, 'Expected an array of user objects'
+        return data, None
+
+    return None, f"Unsupported format '{fmt}'"
+
+def _truthy(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+def find_existing(usernames, emails):
+    """
+    The usernames and emails among the given ones that are already taken,
+    looked up with a single query served by the unique indexes on both
+    columns. Returns (taken usernames, taken emails).
+    """
+    if not usernames and not emails:
+        return set(), set()
+    rows = db.session.execute(
+        db.select(User.username, User.email).where(
+            db.or_(User.username.in_(usernames), User.email.in_(emails))
+        )
+    ).all()
+    return {row.username for row in rows}, {row.email for row in rows}
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hash passwords in parallel on a pool of worker processes (one per CPU by
+    default). Workers are spawned rather than forked so it is safe to call
+    from a threaded server.
+    """
+    if len(passwords) < POOL_THRESHOLD or workers == 1:
+        return [generate_password_hash(password) for password in passwords]
+
+    workers = min(workers or os.cpu_count() or 1, len(passwords))
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
+
+def provision_users(records, workers=None, batch_size=1000):
+    """
+    Create users from records, skipping invalid ones and ones whose username
+    or email is taken (already registered, or earlier in the same input).
+    Passwords are hashed on a process pool and rows inserted batch_size at
+    a time. The caller commits. Returns {'created': n, 'skipped': [...]},
+    each skipped entry giving the record's index and the reason.
+    """
+    skipped = []
+    valid = []
+    for index, record in enumerate(records):
+        missing = [field for field in REQUIRED_FIELDS if not str(record.get(field) or '').strip()]
+        if missing:
+            skipped.append({'index': index, 'reason': f"Missing {', '.join(missing)}"})
+        else:
+            valid.append((index, record))
+
+    taken_usernames, taken_emails = find_existing(
+        [record['username'] for _, record in valid],
+        [record['email'] for _, record in valid]
+    )
+
+    accepted = []
+    for index, record in valid:
+        if record['username'] in taken_usernames:
+            skipped.append({'index': index, 'username': record['username'], 'reason': 'Username already exists'})
+        elif record['email'] in taken_emails:
+            skipped.append({'index': index, 'username': record['username'], 'reason': 'Email already exists'})
+        else:
+            # Later records with the same username or email are duplicates of this one
+            taken_usernames.add(record['username'])
+            taken_emails.add(record['email'])
+            accepted.append(record)
+
+    hashes = hash_passwords([record['password'] for record in accepted], workers)
+    rows = [
+        {
+            'username': record['username'],
+            'email': record['email'],
+            'password_hash': password_hash,
+            'is_admin': _truthy(record.get('is_admin', False))
+        }
+        for record, password_hash in zip(accepted, hashes)
+    ]
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        db.session.execute(db.insert(User), batch)
+        replicate_users(db.session.execute(
+            db.select(User.id).where(User.username.in_([row['username'] for row in batch]))
+        ).scalars().all())
+
+    skipped.sort(key=lambda entry: entry['index'])
+    logger.info(f"Provisioned {len(rows)} users, skipped {len(skipped)}")
+    return {'created': len(rows), 'skipped': skipped}
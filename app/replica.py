@@ -0,0 +1,147 @@
+import math
+import threading
+import time
+from flask import g, request, has_app_context
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import inspect
+
+REPLICA_BIND = 'replica'
+READ_METHODS = ('GET', 'HEAD')
+# Response header carrying the signed write marker, for clients without cookies
+WRITE_MARKER_HEADER = 'X-Last-Write'
+
+class RoutingSession(Session):
+    """
+    Session that sends queries to the read replica bind while the current
+    request has been routed there, and everything else (including flushes)
+    to the primary.
+
+    While the app context has a shard selected (g.shard, see
+    app.sharding), tables marked as sharded go to that shard's bind
+    instead, reads and writes alike.
+
+    While info['defer_commit'] is set (see the batch endpoint), commit()
+    only flushes so several handlers can share one transaction.
+    """
+
+    def commit(self):
+        if self.info.get('defer_commit'):
+            self.flush()
+            return
+        super().commit()
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and mapper is not None and has_app_context() and g.get('shard'):
+            if inspect(mapper).local_table.info.get('sharded'):
+                return self._db.engines[f'shard{g.shard}']
+        if (bind is None and not self._flushing and has_app_context()
+                and g.get('use_replica') and REPLICA_BIND in self._db.engines):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class RecentWriters:
+    """
+    Per-process record of users who wrote recently. Their reads stay on the
+    primary until the replica has had time to catch up with their writes.
+    Only covers requests served by the same process; the signed write
+    marker below carries the same information to the other workers.
+    """
+
+    def __init__(self):
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id, ttl):
+        now = time.monotonic()
+        with self._lock:
+            self._until[user_id] = now + ttl
+            # Drop expired markers so the map stays small
+            if len(self._until) > 10000:
+                self._until = {k: v for k, v in self._until.items() if v > now}
+
+    def is_recent(self, user_id):
+        with self._lock:
+            until = self._until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+recent_writers = RecentWriters()
+
+def _marker_serializer(app):
+    return URLSafeSerializer(app.secret_key, salt='replica-last-write')
+
+def _has_write_marker(app, user_id):
+    """
+    Whether the request carries a valid marker of a write by user_id less
+    than REPLICA_LAG_TOLERANCE seconds ago. Clients send back the cookie, or
+    the WRITE_MARKER_HEADER value of their last write response.
+    """
+    value = request.headers.get(WRITE_MARKER_HEADER) or request.cookies.get(app.config['REPLICA_WRITE_COOKIE'])
+    if not value:
+        return False
+    try:
+        marker = _marker_serializer(app).loads(value)
+    except BadSignature:
+        return False
+    return marker.get('user') == user_id and marker.get('until', 0) > time.time()
+
+def _set_write_marker(app, response, user_id):
+    ttl = app.config['REPLICA_LAG_TOLERANCE']
+    value = _marker_serializer(app).dumps({'user': user_id, 'until': time.time() + ttl})
+    response.headers[WRITE_MARKER_HEADER] = value
+    response.set_cookie(
+        app.config['REPLICA_WRITE_COOKIE'], value, max_age=math.ceil(ttl),
+        httponly=True, secure=request.is_secure, samesite='Lax'
+    )
+
+def _current_user_id():
+    """
+    The user of the request's token, read before the view runs. Only the
+    signature is checked: revocation is left to the view's own verification,
+    so routing never costs a revoked-token lookup.
+    """
+    try:
+        verify_jwt_in_request(optional=True, skip_revocation_check=True)
+        return get_jwt_identity()
+    except Exception:
+        # Invalid tokens are rejected by the view itself
+        return None
+
+def _verified_user_id():
+    # The identity the view already verified, without decoding the token again
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+def init_read_routing(app):
+    """
+    Route GET requests to the replica bind, except for users who wrote within
+    REPLICA_LAG_TOLERANCE seconds. Does nothing unless a replica is configured.
+    Every server process may serve the user's next read, so a successful
+    write hands the client a signed marker (cookie and header) that sends
+    its reads to the primary until the tolerance has passed.
+    """
+    if REPLICA_BIND not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+
+    @app.before_request
+    def choose_database():
+        # use_replica is already False for sub-requests of a batch, which must
+        # read the batch's own uncommitted writes from the primary
+        if request.method not in READ_METHODS or g.get('use_replica') is False:
+            return
+        user_id = _current_user_id()
+        g.use_replica = not (user_id is not None and (
+            recent_writers.is_recent(user_id) or _has_write_marker(app, user_id)
+        ))
+
+    @app.after_request
+    def remember_writer(response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            user_id = _verified_user_id()
+            if user_id is not None:
+                recent_writers.mark(user_id, app.config['REPLICA_LAG_TOLERANCE'])
+                _set_write_marker(app, response, user_id)
+        return response
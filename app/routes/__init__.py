@@ -3,6 +3,11 @@ from .auth import auth_bp
 from .boards import boards_bp
 from .lists import lists_bp
 from .cards import cards_bp
+from .meta import meta_bp
+from .batch import batch_bp
+from .archive import archive_bp
+from .jobs import jobs_bp
+from .admin import admin_bp
 
 # Create API blueprint
 api_bp = Blueprint('api', __name__, url_prefix='/api')
@@ -12,3 +17,8 @@ api_bp.register_blueprint(auth_bp, url_prefix='/auth')
 api_bp.register_blueprint(boards_bp, url_prefix='/boards')
 api_bp.register_blueprint(lists_bp)  # Lists routes are nested under boards
 api_bp.register_blueprint(cards_bp)  # Cards routes are nested under lists
+api_bp.register_blueprint(archive_bp)
+api_bp.register_blueprint(meta_bp)
+api_bp.register_blueprint(jobs_bp)
+api_bp.register_blueprint(admin_bp, url_prefix='/admin')
+api_bp.register_blueprint(batch_bp)
@@ -0,0 +1,53 @@
+from functools import wraps
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from ..models import db, User
+from ..provisioning import parse_users, provision_users
+
+admin_bp = Blueprint('admin', __name__)
+
+def admin_required(view):
+    @wraps(view)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        user = db.session.get(User, get_jwt_identity())
+        if user is None or not user.is_admin:
+            return jsonify({'message': 'Admin access required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@admin_bp.route('/users', methods=['POST'])
+@admin_required
+def bulk_create_users():
+    """
+    @api {post} /api/admin/users Provision users in bulk
+    @apiName BulkCreateUsers
+    @apiGroup Admin
+    @apiHeader {String} Authorization Bearer <access_token> of an admin
+    @apiHeader {String} Content-Type application/json (array of {username, email, password, is_admin}) or text/csv (header row with the same columns)
+    @apiSuccess (201) {Number} created Number of users created
+    @apiSuccess (201) {Array} skipped {index, username, reason} of records that were not created
+    """
+    fmt = 'csv' if request.mimetype == 'text/csv' else 'json'
+    records, error = parse_users(request.get_data(as_text=True), fmt)
+    if error:
+        return jsonify({'message': error}), 400
+
+    max_users = current_app.config['PROVISION_MAX_USERS']
+    if len(records) > max_users:
+        return jsonify({'message': f'At most {max_users} users per request, use `flask provision-users` for more'}), 400
+
+    try:
+        result = provision_users(
+            records,
+            workers=current_app.config['PROVISION_HASH_WORKERS'],
+            batch_size=current_app.config['PROVISION_BATCH_SIZE']
+        )
+        db.session.commit()
+    except IntegrityError:
+        # A username or email was registered while we were hashing
+        db.session.rollback()
+        return jsonify({'message': 'Some users were registered concurrently, nothing was created; retry'}), 409
+
+    return jsonify(result), 201
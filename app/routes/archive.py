@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, abort
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..models import db, Card, List, Board, UserBoard, ArchivedCard
+from ..archive import archive_cards, restore_cards
+from ..cache import invalidate_board
+from .cards import get_card_for_member
+
+archive_bp = Blueprint('archive', __name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+@archive_bp.route('/cards/<int:card_id>/archive', methods=['POST'])
+@jwt_required()
+def archive_card(card_id):
+    """
+    @api {post} /api/cards/:id/archive Archive a card
+    @apiName ArchiveCard
+    @apiGroup Archive
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Number} id Card ID
+    @apiSuccess {Number} archived Number of cards archived
+    """
+    current_user_id = get_jwt_identity()
+    card, is_member = get_card_for_member(card_id, current_user_id)
+
+    if not is_member:
+        return jsonify({'message': 'Access denied'}), 403
+
+    board_id = card.board_id
+    archived = archive_cards(Card.id == card_id)
+    invalidate_board(board_id)
+    db.session.commit()
+
+    return jsonify({'archived': archived}), 200
+
+@archive_bp.route('/lists/<int:list_id>/archive', methods=['POST'])
+@jwt_required()
+def archive_list_cards(list_id):
+    """
+    @api {post} /api/lists/:id/archive Archive all cards of a list
+    @apiName ArchiveListCards
+    @apiGroup Archive
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Number} id List ID
+    @apiSuccess {Number} archived Number of cards archived
+    """
+    current_user_id = get_jwt_identity()
+    list = List.query.get_or_404(list_id)
+    board = Board.query.get(list.board_id)
+
+    if not any(member.id == current_user_id for member in board.members):
+        return jsonify({'message': 'Access denied'}), 403
+
+    archived = archive_cards(Card.list_id == list_id)
+    invalidate_board(board.id)
+    db.session.commit()
+
+    return jsonify({'archived': archived}), 200
+
+@archive_bp.route('/boards/<int:board_id>/archive', methods=['POST'])
+@jwt_required()
+def archive_old_cards(board_id):
+    """
+    @api {post} /api/boards/:id/archive Archive a board's old cards
+    @apiName ArchiveOldCards
+    @apiGroup Archive
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Number} id Board ID
+    @apiParam {Number} older_than_days Archive cards created more than this many days ago
+    @apiSuccess {Number} archived Number of cards archived
+    """
+    current_user_id = get_jwt_identity()
+    board = Board.query.get_or_404(board_id)
+
+    if not any(member.id == current_user_id for member in board.members):
+        return jsonify({'message': 'Access denied'}), 403
+
+    data = request.get_json()
+    days = data.get('older_than_days') if data else None
+    if not isinstance(days, int) or isinstance(days, bool) or days < 0:
+        return jsonify({'message': 'older_than_days must be a non-negative integer'}), 400
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archived = archive_cards(Card.board_id == board_id, Card.created_at < cutoff)
+    invalidate_board(board.id)
+    db.session.commit()
+
+    return jsonify({'archived': archived}), 200
+
+@archive_bp.route('/boards/<int:board_id>/archived-cards', methods=['GET'])
+@jwt_required()
+def get_archived_cards(board_id):
+    """
+    @api {get} /api/boards/:id/archived-cards Get archived cards
+    @apiName GetArchivedCards
+    @apiGroup Archive
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Number} id Board ID
+    @apiParam {Number} limit Page size (optional, default 50, max 200)
+    @apiParam {Number} offset Number of cards to skip (optional)
+    @apiSuccess {Array} cards Archived card objects, most recently archived first
+    """
+    current_user_id = get_jwt_identity()
+    board = Board.query.get_or_404(board_id)
+
+    if not any(member.id == current_user_id for member in board.members):
+        return jsonify({'message': 'Access denied'}), 403
+
+    limit = min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    cards = ArchivedCard.query.filter_by(board_id=board_id).order_by(
+        ArchivedCard.archived_at.desc(), ArchivedCard.id.desc()
+    ).offset(offset).limit(max(limit, 1)).all()
+
+    return jsonify([card.to_dict() for card in cards]), 200
+
+@archive_bp.route('/archived-cards/<int:card_id>/restore', methods=['POST'])
+@jwt_required()
+def restore_card(card_id):
+    """
+    @api {post} /api/archived-cards/:id/restore Restore an archived card
+    @apiName RestoreCard
+    @apiGroup Archive
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Number} id Archived card ID
+    @apiSuccess {Number} restored Number of cards restored
+    """
+    current_user_id = get_jwt_identity()
+    row = db.session.query(ArchivedCard.board_id, UserBoard.user_id).outerjoin(
+        UserBoard,
+        db.and_(UserBoard.board_id == ArchivedCard.board_id, UserBoard.user_id == current_user_id)
+    ).filter(ArchivedCard.id == card_id).first()
+
+    if row is None:
+        abort(404)
+
+    board_id, member_id = row
+    if member_id is None:
+        return jsonify({'message': 'Access denied'}), 403
+
+    restored = restore_cards(ArchivedCard.id == card_id)
+    invalidate_board(board_id)
+    db.session.commit()
+
+    return jsonify({'restored': restored}), 200
+
+@archive_bp.route('/boards/<int:board_id>/archived-cards/restore', methods=['POST'])
+@jwt_required()
+def restore_cards_bulk(board_id):
+    """
+    @api {post} /api/boards/:id/archived-cards/restore Restore several archived cards
+    @apiName RestoreCards
+    @apiGroup Archive
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Number} id Board ID
+    @apiParam {Array} ids Archived card IDs
+    @apiSuccess {Number} restored Number of cards restored
+    """
+    current_user_id = get_jwt_identity()
+    board = Board.query.get_or_404(board_id)
+
+    if not any(member.id == current_user_id for member in board.members):
+        return jsonify({'message': 'Access denied'}), 403
+
+    data = request.get_json()
+    if not data or not isinstance(data.get('ids'), list):
+        return jsonify({'message': 'Ids array is required'}), 400
+
+    restored = restore_cards(ArchivedCard.board_id == board_id, ArchivedCard.id.in_(data['ids']))
+    invalidate_board(board.id)
+    db.session.commit()
+
+    return jsonify({'restored': restored}), 200
@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import create_access_token
-from ..models import db, User
+from datetime import datetime
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
+from ..models import db, User, BoardDirectory, RevokedToken
+from ..bus import notify, MEMBERSHIP_CHANGED, TOKEN_REVOKED
+from ..provisioning import find_existing
+from ..sharding import replicate_users
 from werkzeug.security import generate_password_hash
 import logging
 
@@ -26,11 +30,13 @@ def register():
         logger.warning("Missing required fields in registration")
         return jsonify({'message': 'Missing required fields'}), 400
 
-    if User.query.filter_by(username=data['username']).first():
+    taken_usernames, taken_emails = find_existing([data['username']], [data['email']])
+
+    if data['username'] in taken_usernames:
         logger.warning("Username already exists")
         return jsonify({'message': 'Username already exists'}), 400
 
-    if User.query.filter_by(email=data['email']).first():
+    if data['email'] in taken_emails:
         logger.warning("Email already exists")
         return jsonify({'message': 'Email already exists'}), 400
 
@@ -41,6 +47,8 @@ def register():
     user.set_password(data['password'])
 
     db.session.add(user)
+    db.session.flush()
+    replicate_users([user.id])
     db.session.commit()
     logger.info(f"User registered successfully: {user.username}")
 
@@ -82,6 +90,31 @@ def login():
         'user': user.to_dict()
     }), 200
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """
+    @api {post} /api/auth/logout Revoke the current access token
+    @apiName LogoutUser
+    @apiGroup Authentication
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiSuccess {String} message Success message
+    """
+    claims = get_jwt()
+    now = datetime.utcnow()
+    # Revoked tokens past their expiry are rejected anyway, so drop them
+    RevokedToken.query.filter(RevokedToken.expires_at < now).delete(synchronize_session=False)
+    db.session.add(RevokedToken(
+        jti=claims['jti'],
+        user_id=get_jwt_identity(),
+        expires_at=datetime.utcfromtimestamp(claims['exp']) if 'exp' in claims else datetime.max
+    ))
+    notify(TOKEN_REVOKED, claims['jti'])
+    db.session.commit()
+    logger.info(f"Token revoked: {claims['jti']}")
+
+    return jsonify({'message': 'Logged out successfully'}), 200
+
 @auth_bp.route('/reset-test-user', methods=['POST'])
 def reset_test_user():
     if not current_app.config.get('TESTING', False):
@@ -93,6 +126,11 @@ def reset_test_user():
         return jsonify({'message': 'Username is required'}), 400
 
     try:
+        memberships = db.session.execute(
+            db.select(BoardDirectory.user_id, BoardDirectory.board_id).join(User).where(User.username == username)
+        ).all()
+        for user_id, board_id in memberships:
+            notify(MEMBERSHIP_CHANGED, user_id, board_id)
         user_deleted = User.delete_by_username(username)
         if user_deleted:
             return jsonify({'message': 'User reset successfully'}), 200
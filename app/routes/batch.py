@@ -0,0 +1,112 @@
+from flask import Blueprint, request, jsonify, current_app, g
+from flask_jwt_extended import jwt_required
+from werkzeug.exceptions import NotFound, MethodNotAllowed
+from ..models import db
+from ..sharding import shard_count, shard_of_view_args
+
+batch_bp = Blueprint('batch', __name__)
+
+# Only board, list, card and archive handlers can run inside a batch
+BATCHABLE_BLUEPRINTS = ('api.boards.', 'api.lists.', 'api.cards.', 'api.archive.')
+
+def _resolve(operation):
+    """
+    Map a sub-operation to (method, path, view_args) after validating it
+    against the URL map. Returns an error message instead when it cannot
+    be run.
+    """
+    if not isinstance(operation, dict) or 'path' not in operation:
+        return None, 'Each operation needs a path'
+
+    method = str(operation.get('method', 'GET')).upper()
+    path = operation['path']
+    if '?' in path:
+        return None, 'Query strings are not supported in batch operations'
+    if not path.startswith('/api/'):
+        path = '/api/' + path.lstrip('/')
+
+    try:
+        endpoint, view_args = current_app.url_map.bind('').match(path, method=method)
+    except (NotFound, MethodNotAllowed):
+        return None, f'No route for {method} {path}'
+
+    if not endpoint.startswith(BATCHABLE_BLUEPRINTS):
+        return None, f'{method} {path} cannot be batched'
+
+    return (method, path, view_args), None
+
+@batch_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def run_batch():
+    """
+    @api {post} /api/batch Run several operations in one transaction
+    @apiName RunBatch
+    @apiGroup Batch
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Array} operations Ordered array of {method, path, body} objects,
+        e.g. {"method": "PUT", "path": "/api/cards/1", "body": {"title": "New"}}
+    @apiSuccess {Array} results Per-operation {status, body}, in request order
+    @apiError (4xx) failed_index Index of the first failing operation; nothing is committed
+    @apiError (400) message When sharding is on, the operations touch boards on more than one shard
+    """
+    data = request.get_json()
+    if not data or not isinstance(data.get('operations'), list) or not data['operations']:
+        return jsonify({'message': 'Operations array is required'}), 400
+
+    operations = data['operations']
+    if len(operations) > current_app.config['BATCH_MAX_OPERATIONS']:
+        return jsonify({'message': 'Too many operations'}), 400
+
+    resolved = []
+    for index, operation in enumerate(operations):
+        target, error = _resolve(operation)
+        if error:
+            return jsonify({'message': error, 'failed_index': index}), 400
+        resolved.append((target, operation.get('body')))
+
+    # Each shard commits on its own, so a batch must stay on one of them to
+    # be all or nothing. Ids past the last shard 404 in their operation.
+    shards = {shard_of_view_args(view_args) for (_, _, view_args), _ in resolved} - {None}
+    shards &= set(range(shard_count()))
+    if len(shards) > 1:
+        return jsonify({'message': 'All operations of a batch must be on boards of the same shard'}), 400
+    # Boards created by the batch go to the same shard
+    g.batch_shard = shards.pop() if shards else None
+
+    app = current_app._get_current_object()
+    headers = {'Authorization': request.headers.get('Authorization', '')}
+    results = []
+
+    # Sub-requests share this app context, and with it the database session.
+    # Their commits are deferred so everything lands in one transaction, and
+    # boards and memberships they load stay in the session's identity map
+    # for the following operations instead of being queried again.
+    db.session.info['defer_commit'] = True
+    g.use_replica = False
+    try:
+        for index, ((method, path, _), body) in enumerate(resolved):
+            with app.test_request_context(path, method=method, json=body, headers=headers):
+                response = app.full_dispatch_request()
+
+            results.append({
+                'status': response.status_code,
+                'body': response.get_json(silent=True)
+            })
+
+            if response.status_code >= 400:
+                db.session.rollback()
+                return jsonify({
+                    'message': 'Batch operation failed, no changes were applied',
+                    'failed_index': index,
+                    'results': results
+                }), response.status_code
+
+        db.session.info['defer_commit'] = False
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.info['defer_commit'] = False
+
+    return jsonify({'results': results}), 200
@@ -1,25 +1,63 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request, get_jwt
-from ..models import db, Board, User, UserBoard
+from flask import Blueprint, request, jsonify, current_app, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..models import db, Board, User, UserBoard, List, Activity
+from ..jobs import enqueue
+from .. import tasks  # registers the board job handlers
+from .. import activity
+from ..pagination import parse_page
+from ..duplicate import copy_board
+from ..cache import cached_response, invalidate_board
+from ..access import is_member
+from ..idempotency import idempotent
+from ..bus import notify, BOARD_DELETED, MEMBERSHIP_CHANGED
+from ..streaming import json_items, join_items, stream_response
+from ..sharding import (
+    place_board, use_shard, shard_count, user_shards, fan_out,
+    directory_add, directory_remove, directory_remove_board
+)
+from ..fieldsets import parse_fieldset, board_load_options, BOARD_INCLUDES
 
 boards_bp = Blueprint('boards', __name__)
 
-def check_token_revoked():
-    verify_jwt_in_request()
-    jti = get_jwt()['jti']
-    current_app.logger.info(f"Checking token revocation for jti: {jti}")
-    # Here you can implement token revocation check if needed
-    # For now, just log and return False
-    return False
+# Template listings never embed members: templates are visible to every user
+TEMPLATE_INCLUDES = ('lists', 'cards')
+
+def job_accepted(job, message):
+    """
+    202 response for work handed to the job runner, pointing at its status.
+    """
+    response = jsonify({'message': message, 'job': job.to_dict()})
+    response.headers['Location'] = url_for('api.jobs.get_job', job_id=job.id)
+    return response, 202
+
+def validate_board_import(data):
+    """
+    Check an import document has the shape export_board produces.
+    Returns an error message, or None if it is valid.
+    """
+    if not isinstance(data, dict) or not data.get('title'):
+        return 'Title is required'
+    lists = data.get('lists', [])
+    if not isinstance(lists, list):
+        return 'Lists must be an array'
+    for entry in lists:
+        if not isinstance(entry, dict) or not entry.get('title'):
+            return 'Every list needs a title'
+        cards = entry.get('cards', [])
+        if not isinstance(cards, list) or not all(isinstance(card, dict) and card.get('title') for card in cards):
+            return 'Every card needs a title'
+    return None
 
 @boards_bp.route('', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_board():
     """
     @api {post} /api/boards Create a new board
     @apiName CreateBoard
     @apiGroup Boards
     @apiHeader {String} Authorization Bearer <access_token>
+    @apiHeader {String} Idempotency-Key Client-chosen key; retries with the same key replay the first response (optional)
     @apiParam {String} title Board title
     @apiSuccess {Object} board Created board object
     """
@@ -27,9 +65,6 @@ def create_board():
     auth_header = request.headers.get('Authorization')
     current_app.logger.info(f"Authorization header: {auth_header}")
 
-    if check_token_revoked():
-        return jsonify({'message': 'Token has been revoked'}), 401
-
     current_user_id = get_jwt_identity()
     current_app.logger.info(f"Current user ID from token: {current_user_id}")
     data = request.get_json()
@@ -37,11 +72,14 @@ def create_board():
     if not data or 'title' not in data:
         return jsonify({'message': 'Title is required'}), 400
 
-    board = Board(title=data['title'])
+    place_board()
+    board = Board(title=data['title'], created_by=current_user_id)
     user = User.query.get(current_user_id)
     board.members.append(user)
 
     db.session.add(board)
+    db.session.flush()
+    directory_add(current_user_id, board.id)
     db.session.commit()
 
     return jsonify(board.to_dict()), 201
@@ -54,12 +92,30 @@ def get_user_boards():
     @apiName GetUserBoards
     @apiGroup Boards
     @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {String} fields Board fields to return, comma separated (optional)
+    @apiParam {String} fields[type] Fields for list, card or user objects (optional)
+    @apiParam {String} include Relationships to embed: lists, cards, members (optional, default all)
     @apiSuccess {Array} boards List of board objects
     """
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    return jsonify([board.to_dict() for board in user.boards]), 200
+    fieldset, error = parse_fieldset(request.args, 'board', BOARD_INCLUDES)
+    if error:
+        return jsonify({'message': error}), 400
+
+    def boards():
+        query = Board.query.join(UserBoard, UserBoard.board_id == Board.id).filter(
+            UserBoard.user_id == current_user_id
+        ).options(*board_load_options(fieldset)).order_by(Board.id)
+        return json_items(query, lambda board: board.to_dict(fieldset))
+
+    # Ask only the shards the directory lists for this user, in parallel.
+    # Board ids grow with the shard number, so the result stays ordered by id.
+    # Streamed, so memory stays flat however many boards the user has
+    shards = user_shards(current_user_id)
+    if len(shards) == 1:
+        use_shard(shards[0])
+        return stream_response(join_items(boards())), 200
+    return stream_response(join_items(fan_out(shards, boards))), 200
 
 @boards_bp.route('/<int:board_id>', methods=['GET'])
 @jwt_required()
@@ -70,15 +126,63 @@ def get_board(board_id):
     @apiGroup Boards
     @apiHeader {String} Authorization Bearer <access_token>
     @apiParam {Number} id Board ID
+    @apiParam {String} fields Board fields to return, comma separated (optional)
+    @apiParam {String} fields[type] Fields for list, card or user objects (optional)
+    @apiParam {String} include Relationships to embed: lists, cards, members (optional, default all)
     @apiSuccess {Object} board Board object
     """
     current_user_id = get_jwt_identity()
+    fieldset, error = parse_fieldset(request.args, 'board', BOARD_INCLUDES)
+    if error:
+        return jsonify({'message': error}), 400
+
     board = Board.query.get_or_404(board_id)
 
-    if not any(member.id == current_user_id for member in board.members):
+    if not is_member(current_user_id, board_id):
         return jsonify({'message': 'Access denied'}), 403
 
-    return jsonify(board.to_dict()), 200
+    def build():
+        # Reload with only the requested columns and relationships
+        board = Board.query.options(*board_load_options(fieldset)).populate_existing().get(board_id)
+        return board.to_dict(fieldset)
+
+    return cached_response(('board', board.id, board.version, fieldset.key), build), 200
+
+@boards_bp.route('/<int:board_id>/stats', methods=['GET'])
+@jwt_required()
+def get_board_stats(board_id):
+    """
+    @api {get} /api/boards/:id/stats Get board statistics
+    @apiName GetBoardStats
+    @apiGroup Boards
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Number} id Board ID
+    @apiSuccess {Number} list_count Number of lists on the board
+    @apiSuccess {Number} card_count Number of cards on the board
+    @apiSuccess {Array} lists Per-list {id, title, position, card_count}
+    """
+    current_user_id = get_jwt_identity()
+    board = Board.query.get_or_404(board_id)
+
+    if not is_member(current_user_id, board_id):
+        return jsonify({'message': 'Access denied'}), 403
+
+    # Served from the maintained counters, no cards are read
+    lists = db.session.execute(
+        db.select(List.id, List.title, List.position, List.card_count)
+        .where(List.board_id == board_id)
+        .order_by(List.position)
+    ).all()
+
+    return jsonify({
+        'board_id': board.id,
+        'list_count': board.list_count,
+        'card_count': board.card_count,
+        'lists': [
+            {'id': id, 'title': title, 'position': position, 'card_count': card_count}
+            for id, title, position, card_count in lists
+        ]
+    }), 200
 
 @boards_bp.route('/<int:board_id>', methods=['PUT'])
 @jwt_required()
@@ -89,7 +193,8 @@ def update_board(board_id):
     @apiGroup Boards
     @apiHeader {String} Authorization Bearer <access_token>
     @apiParam {Number} id Board ID
-    @apiParam {String} title New board title
+    @apiParam {String} title New board title (optional)
+    @apiParam {Boolean} is_template Offer the board as a template to all users; board creator or admin only (optional)
     @apiSuccess {Object} board Updated board object
     """
     current_user_id = get_jwt_identity()
@@ -99,10 +204,20 @@ def update_board(board_id):
         return jsonify({'message': 'Access denied'}), 403
 
     data = request.get_json()
-    if not data or 'title' not in data:
+    if not data or ('title' not in data and 'is_template' not in data):
         return jsonify({'message': 'Title is required'}), 400
 
-    board.title = data['title']
+    if 'is_template' in data and board.created_by != current_user_id \
+            and not db.session.get(User, current_user_id).is_admin:
+        return jsonify({'message': 'Only the board creator or an admin can change is_template'}), 403
+
+    if 'title' in data:
+        board.title = data['title']
+    if 'is_template' in data:
+        board.is_template = bool(data['is_template'])
+    invalidate_board(board.id)
+    activity.record(board.id, current_user_id, 'board.updated', board.id,
+                    title=board.title, fields=sorted(set(data) & {'title', 'is_template'}))
     db.session.commit()
 
     return jsonify(board.to_dict()), 200
@@ -116,7 +231,9 @@ def delete_board(board_id):
     @apiGroup Boards
     @apiHeader {String} Authorization Bearer <access_token>
     @apiParam {Number} id Board ID
+    @apiParam {Boolean} async Delete in the background in batches (optional)
     @apiSuccess {String} message Success message
+    @apiSuccess (202) {Object} job Background job when async, poll GET /api/jobs/:id
     """
     current_user_id = get_jwt_identity()
     board = Board.query.get_or_404(board_id)
@@ -124,7 +241,20 @@ def delete_board(board_id):
     if not any(member.id == current_user_id for member in board.members):
         return jsonify({'message': 'Access denied'}), 403
 
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        # Revoke every membership first so the board disappears for all users
+        # right away, then remove its contents in the background
+        UserBoard.query.filter_by(board_id=board_id).delete(synchronize_session=False)
+        directory_remove_board(board_id)
+        notify(BOARD_DELETED, board_id)
+        job = enqueue('delete_board', {'board_id': board_id}, current_user_id, board_id)
+        db.session.commit()
+        return job_accepted(job, 'Board deletion scheduled')
+
+    # Lists and cards are removed by the database (ON DELETE CASCADE)
     db.session.delete(board)
+    directory_remove_board(board_id)
+    notify(BOARD_DELETED, board_id)
     db.session.commit()
 
     return jsonify({'message': 'Board deleted successfully'}), 200
@@ -159,6 +289,9 @@ def add_member(board_id):
         return jsonify({'message': 'User is already a member'}), 400
 
     board.members.append(user)
+    directory_add(user.id, board.id)
+    invalidate_board(board.id)
+    activity.record(board.id, current_user_id, 'member.added', user.id, username=user.username)
     db.session.commit()
 
     return jsonify(board.to_dict()), 200
@@ -189,6 +322,152 @@ def remove_member(board_id, user_id):
         return jsonify({'message': 'Cannot remove last member'}), 400
 
     board.members.remove(user)
+    directory_remove(user.id, board.id)
+    invalidate_board(board.id)
+    notify(MEMBERSHIP_CHANGED, user.id, board.id)
+    activity.record(board.id, current_user_id, 'member.removed', user.id, username=user.username)
     db.session.commit()
 
     return jsonify(board.to_dict()), 200
+
+@boards_bp.route('/<int:board_id>/activity', methods=['GET'])
+@jwt_required()
+def get_board_activity(board_id):
+    """
+    @api {get} /api/boards/:id/activity Get board activity feed
+    @apiName GetBoardActivity
+    @apiGroup Boards
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Number} id Board ID
+    @apiParam {Number} limit Page size (optional, default 100)
+    @apiParam {String} cursor next_cursor of the previous page (optional)
+    @apiSuccess {Array} activity Entries, newest first, with the acting user's username
+    @apiSuccess {String} next_cursor Cursor of the next page, null on the last page
+    @apiDescription Eventually consistent: entries are written in the background, so a change can take up to ACTIVITY_FLUSH_INTERVAL seconds to appear.
+    """
+    current_user_id = get_jwt_identity()
+    page, error = parse_page(request.args, key_length=1, required=True)
+    if error:
+        return jsonify({'message': error}), 400
+
+    Board.query.get_or_404(board_id)
+
+    if not is_member(current_user_id, board_id):
+        return jsonify({'message': 'Access denied'}), 403
+
+    query = db.select(Activity, User.username).outerjoin(User, User.id == Activity.user_id).where(
+        Activity.board_id == board_id
+    ).order_by(Activity.id.desc())
+    rows, next_cursor = page.split(
+        db.session.execute(page.apply(query, Activity.id, descending=True)).all(),
+        key=lambda row: (row.Activity.id,)
+    )
+
+    return jsonify({
+        'activity': [{**entry.to_dict(), 'username': username} for entry, username in rows],
+        'next_cursor': next_cursor
+    }), 200
+
+@boards_bp.route('/<int:board_id>/export', methods=['POST'])
+@jwt_required()
+def export_board(board_id):
+    """
+    @api {post} /api/boards/:id/export Export a board in the background
+    @apiName ExportBoard
+    @apiGroup Boards
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Number} id Board ID
+    @apiSuccess (202) {Object} job Background job; its result is the exported board
+    """
+    current_user_id = get_jwt_identity()
+    board = Board.query.get_or_404(board_id)
+
+    if not any(member.id == current_user_id for member in board.members):
+        return jsonify({'message': 'Access denied'}), 403
+
+    job = enqueue('export_board', {'board_id': board_id}, current_user_id, board_id)
+    db.session.commit()
+
+    return job_accepted(job, 'Board export scheduled')
+
+@boards_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_board():
+    """
+    @api {post} /api/boards/import Import a board in the background
+    @apiName ImportBoard
+    @apiGroup Boards
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {String} title Board title
+    @apiParam {Array} lists Array of {title, position, cards: [{title, description, position}]}, as produced by export
+    @apiSuccess (202) {Object} job Background job; its result holds the new board_id
+    """
+    current_user_id = get_jwt_identity()
+    data = request.get_json()
+
+    error = validate_board_import(data)
+    if error:
+        return jsonify({'message': error}), 400
+
+    job = enqueue('import_board', {'user_id': current_user_id, 'data': data}, current_user_id)
+    db.session.commit()
+
+    return job_accepted(job, 'Board import scheduled')
+
+@boards_bp.route('/templates', methods=['GET'])
+@jwt_required()
+def get_templates():
+    """
+    @api {get} /api/boards/templates Get template boards
+    @apiName GetTemplates
+    @apiGroup Boards
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {String} fields Board fields to return, comma separated (optional)
+    @apiParam {String} include Relationships to embed: lists, cards (optional, default all)
+    @apiSuccess {Array} boards Boards flagged as templates, any user can duplicate them
+    """
+    fieldset, error = parse_fieldset(request.args, 'board', TEMPLATE_INCLUDES)
+    if error:
+        return jsonify({'message': error}), 400
+
+    def templates():
+        query = Board.query.filter(Board.is_template.is_(True)).options(
+            *board_load_options(fieldset)
+        ).order_by(Board.id)
+        return json_items(query, lambda board: board.to_dict(fieldset))
+
+    return stream_response(join_items(fan_out(range(shard_count()), templates))), 200
+
+@boards_bp.route('/<int:board_id>/duplicate', methods=['POST'])
+@jwt_required()
+def duplicate_board(board_id):
+    """
+    @api {post} /api/boards/:id/duplicate Duplicate a board or template
+    @apiName DuplicateBoard
+    @apiGroup Boards
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Number} id Board ID, of a board you are a member of or a template
+    @apiParam {String} title Title of the copy (optional, defaults to "<title> (copy)")
+    @apiParam {Boolean} async Copy in the background (optional)
+    @apiSuccess (201) {Object} board The new board with its lists and cards
+    @apiSuccess (202) {Object} job Background job when async; its result holds the new board_id
+    """
+    current_user_id = get_jwt_identity()
+    board = Board.query.get_or_404(board_id)
+
+    if not board.is_template and not any(member.id == current_user_id for member in board.members):
+        return jsonify({'message': 'Access denied'}), 403
+
+    data = request.get_json(silent=True) or {}
+    title = data.get('title') or f'{board.title} (copy)'[:100]
+
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        job = enqueue('duplicate_board', {'board_id': board_id, 'title': title, 'user_id': current_user_id},
+                      current_user_id, board_id)
+        db.session.commit()
+        return job_accepted(job, 'Board duplication scheduled')
+
+    copy = copy_board(board_id, title, current_user_id)
+    db.session.commit()
+
+    return jsonify(copy.to_dict()), 201
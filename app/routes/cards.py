@@ -1,17 +1,47 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import db, Card, List, Board
+from sqlalchemy.orm import undefer
+from sqlalchemy.orm.exc import StaleDataError
+from ..models import db, Card, List, Board, UserBoard
+from .. import counters, activity
+from ..cache import cached_response, cached_stream, invalidate_board
+from ..streaming import json_array
+from ..access import is_member
+from ..idempotency import idempotent
+from ..sharding import use_shard, shard_for_id
+from ..fieldsets import parse_fieldset, card_load_options
+from ..pagination import parse_page
+from ..concurrency import expected_version, with_etag, conflict_response
 
 cards_bp = Blueprint('cards', __name__)
 
+def get_card_for_member(card_id, user_id, *options):
+    """
+    Fetch a card together with the caller's board membership in one joined query.
+    Returns (card, is_member) and aborts with 404 if the card does not exist.
+    Loader options (e.g. undefer(Card.description)) apply to the card.
+    """
+    row = db.session.query(Card, UserBoard.user_id).outerjoin(
+        UserBoard,
+        db.and_(UserBoard.board_id == Card.board_id, UserBoard.user_id == user_id)
+    ).filter(Card.id == card_id).options(*options).first()
+
+    if row is None:
+        abort(404)
+
+    card, member_id = row
+    return card, member_id is not None
+
 @cards_bp.route('/lists/<int:list_id>/cards', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_card(list_id):
     """
     @api {post} /api/lists/:list_id/cards Create a new card
     @apiName CreateCard
     @apiGroup Cards
     @apiHeader {String} Authorization Bearer <access_token>
+    @apiHeader {String} Idempotency-Key Client-chosen key; retries with the same key replay the first response (optional)
     @apiParam {Number} list_id List ID
     @apiParam {String} title Card title
     @apiParam {String} description Card description (optional)
@@ -37,10 +67,15 @@ def create_card(list_id):
         title=data['title'],
         description=data.get('description', ''),
         list_id=list_id,
+        board_id=list.board_id,
         position=position
     )
 
     db.session.add(card)
+    counters.card_added(list.id, list.board_id)
+    invalidate_board(list.board_id)
+    db.session.flush()
+    activity.record(list.board_id, current_user_id, 'card.created', card.id, title=card.title, list_id=list.id)
     db.session.commit()
 
     return jsonify(card.to_dict()), 201
@@ -54,17 +89,42 @@ def get_cards(list_id):
     @apiGroup Cards
     @apiHeader {String} Authorization Bearer <access_token>
     @apiParam {Number} list_id List ID
-    @apiSuccess {Array} cards List of card objects
+    @apiParam {String} fields Card fields to return, comma separated (optional, description only when named)
+    @apiParam {Number} limit Page size (optional, enables pagination)
+    @apiParam {String} cursor next_cursor of the previous page (optional, enables pagination)
+    @apiSuccess {Array} cards List of card objects, or {cards, next_cursor} when paginated
     """
     current_user_id = get_jwt_identity()
+    fieldset, error = parse_fieldset(request.args, 'card')
+    if error:
+        return jsonify({'message': error}), 400
+
+    page, error = parse_page(request.args)
+    if error:
+        return jsonify({'message': error}), 400
+
     list = List.query.get_or_404(list_id)
     board = Board.query.get(list.board_id)
 
-    if not any(member.id == current_user_id for member in board.members):
+    if not is_member(current_user_id, board.id):
         return jsonify({'message': 'Access denied'}), 403
 
-    cards = Card.query.filter_by(list_id=list_id).order_by(Card.position).all()
-    return jsonify([card.to_dict() for card in cards]), 200
+    query = Card.query.filter_by(list_id=list_id).options(
+        *card_load_options(fieldset, Card.position)
+    ).order_by(Card.position, Card.id)
+
+    if page is None:
+        # The whole list can be arbitrarily long, so stream it
+        return cached_stream(
+            ('cards', board.id, board.version, list_id, fieldset.key, None),
+            lambda: json_array(query, lambda card: card.to_dict(fieldset))
+        ), 200
+
+    def build():
+        cards, next_cursor = page.split(page.apply(query, Card.position, Card.id).all())
+        return {'cards': [card.to_dict(fieldset) for card in cards], 'next_cursor': next_cursor}
+
+    return cached_response(('cards', board.id, board.version, list_id, fieldset.key, page.key), build), 200
 
 @cards_bp.route('/cards/<int:card_id>', methods=['GET'])
 @jwt_required()
@@ -78,14 +138,12 @@ def get_card(card_id):
     @apiSuccess {Object} card Card object
     """
     current_user_id = get_jwt_identity()
-    card = Card.query.get_or_404(card_id)
-    list = List.query.get(card.list_id)
-    board = Board.query.get(list.board_id)
+    card, is_member = get_card_for_member(card_id, current_user_id, undefer(Card.description))
 
-    if not any(member.id == current_user_id for member in board.members):
+    if not is_member:
         return jsonify({'message': 'Access denied'}), 403
 
-    return jsonify(card.to_dict()), 200
+    return with_etag(jsonify(card.to_dict()), card), 200
 
 @cards_bp.route('/cards/<int:card_id>', methods=['PUT'])
 @jwt_required()
@@ -100,36 +158,58 @@ def update_card(card_id):
     @apiParam {String} description New card description (optional)
     @apiParam {Number} list_id New list ID (optional)
     @apiParam {Number} position New position (optional)
+    @apiParam {Number} version Version the change is based on (optional, or send If-Match)
     @apiSuccess {Object} card Updated card object
+    @apiError (409) current Current card when the version does not match
     """
     current_user_id = get_jwt_identity()
-    card = Card.query.get_or_404(card_id)
-    list = List.query.get(card.list_id)
-    board = Board.query.get(list.board_id)
+    # The response, and a 409's current card, include the description
+    card, is_member = get_card_for_member(card_id, current_user_id, undefer(Card.description))
 
-    if not any(member.id == current_user_id for member in board.members):
+    if not is_member:
         return jsonify({'message': 'Access denied'}), 403
 
     data = request.get_json()
     if not data:
         return jsonify({'message': 'No data provided'}), 400
 
-    if 'title' in data:
-        card.title = data['title']
-    if 'description' in data:
-        card.description = data['description']
-    if 'position' in data:
-        card.position = data['position']
-    if 'list_id' in data:
-        # Verify the new list belongs to the same board
-        new_list = List.query.get_or_404(data['list_id'])
-        if new_list.board_id != board.id:
-            return jsonify({'message': 'Invalid list ID'}), 400
-        card.list_id = data['list_id']
+    version, error = expected_version(data)
+    if error:
+        return jsonify({'message': error}), 400
+    if version is not None and version != card.version:
+        return conflict_response(card)
 
-    db.session.commit()
+    try:
+        from_list_id = card.list_id
+        if 'title' in data:
+            card.title = data['title']
+        if 'description' in data:
+            card.description = data['description']
+        if 'position' in data:
+            card.position = data['position']
+        if 'list_id' in data:
+            # Verify the new list belongs to the same board
+            new_list = List.query.get_or_404(data['list_id'])
+            if new_list.board_id != card.board_id:
+                return jsonify({'message': 'Invalid list ID'}), 400
+            counters.card_moved(card.list_id, new_list.id)
+            card.list_id = new_list.id
+            card.board_id = new_list.board_id
 
-    return jsonify(card.to_dict()), 200
+        invalidate_board(card.board_id)
+        if card.list_id != from_list_id:
+            activity.record(card.board_id, current_user_id, 'card.moved', card.id,
+                            title=card.title, from_list_id=from_list_id, to_list_id=card.list_id)
+        else:
+            activity.record(card.board_id, current_user_id, 'card.updated', card.id,
+                            title=card.title, fields=sorted(set(data) & {'title', 'description', 'position'}))
+        db.session.commit()
+    except StaleDataError:
+        # Someone else updated the card between our read and our write
+        db.session.rollback()
+        return conflict_response(Card.query.options(undefer(Card.description)).get_or_404(card_id))
+
+    return with_etag(jsonify(card.to_dict()), card), 200
 
 @cards_bp.route('/cards/<int:card_id>', methods=['DELETE'])
 @jwt_required()
@@ -143,14 +223,15 @@ def delete_card(card_id):
     @apiSuccess {String} message Success message
     """
     current_user_id = get_jwt_identity()
-    card = Card.query.get_or_404(card_id)
-    list = List.query.get(card.list_id)
-    board = Board.query.get(list.board_id)
+    card, is_member = get_card_for_member(card_id, current_user_id)
 
-    if not any(member.id == current_user_id for member in board.members):
+    if not is_member:
         return jsonify({'message': 'Access denied'}), 403
 
     db.session.delete(card)
+    counters.card_removed(card.list_id, card.board_id)
+    invalidate_board(card.board_id)
+    activity.record(card.board_id, current_user_id, 'card.deleted', card.id, title=card.title)
     db.session.commit()
 
     return jsonify({'message': 'Card deleted successfully'}), 200
@@ -163,8 +244,10 @@ def reorder_cards():
     @apiName ReorderCards
     @apiGroup Cards
     @apiHeader {String} Authorization Bearer <access_token>
-    @apiParam {Array} orders Array of {id, position, list_id} objects
+    @apiParam {Array} orders Array of {id, position, list_id, version} objects (version optional)
     @apiSuccess {String} message Success message
+    @apiSuccess {Object} versions New version of each reordered card, by id
+    @apiError (409) current Current cards whose version does not match; nothing is reordered
     """
     current_user_id = get_jwt_identity()
     data = request.get_json()
@@ -172,25 +255,57 @@ def reorder_cards():
     if not data or 'orders' not in data:
         return jsonify({'message': 'Orders array is required'}), 400
 
-    # Verify access to the board
-    first_card = Card.query.get_or_404(data['orders'][0]['id'])
-    list = List.query.get(first_card.list_id)
-    board = Board.query.get(list.board_id)
+    orders = data['orders']
 
-    if not any(member.id == current_user_id for member in board.members):
+    # Verify access to the board. All cards must be on it, so on its shard
+    use_shard(shard_for_id(orders[0]['id']))
+    first_card, is_member = get_card_for_member(orders[0]['id'], current_user_id)
+
+    if not is_member:
         return jsonify({'message': 'Access denied'}), 403
 
-    for order in data['orders']:
-        card = Card.query.get(order['id'])
-        if card:
-            # If moving to a different list, verify it belongs to the same board
-            if 'list_id' in order and order['list_id'] != card.list_id:
-                new_list = List.query.get_or_404(order['list_id'])
-                if new_list.board_id != board.id:
-                    continue
-                card.list_id = order['list_id']
-            card.position = order['position']
+    board_id = first_card.board_id
+    card_ids = [order['id'] for order in orders]
+    cards = {
+        card.id: card
+        for card in Card.query.filter(Card.id.in_(card_ids), Card.board_id == board_id)
+    }
 
-    db.session.commit()
+    stale = [
+        cards[order['id']] for order in orders
+        if order['id'] in cards and 'version' in order and order['version'] != cards[order['id']].version
+    ]
+    if stale:
+        # Reloaded with their descriptions, which the reorder itself never needs
+        return conflict_response(
+            Card.query.options(undefer(Card.description)).filter(Card.id.in_([card.id for card in stale])).all()
+        )
+
+    try:
+        for order in orders:
+            card = cards.get(order['id'])
+            if card:
+                # If moving to a different list, verify it belongs to the same board
+                if 'list_id' in order and order['list_id'] != card.list_id:
+                    new_list = List.query.get_or_404(order['list_id'])
+                    if new_list.board_id != board_id:
+                        continue
+                    counters.card_moved(card.list_id, new_list.id)
+                    activity.record(board_id, current_user_id, 'card.moved', card.id,
+                                    title=card.title, from_list_id=card.list_id, to_list_id=new_list.id)
+                    card.list_id = new_list.id
+                    card.board_id = new_list.board_id
+                card.position = order['position']
+
+        invalidate_board(board_id)
+        activity.record(board_id, current_user_id, 'cards.reordered', card_ids=sorted(cards))
+        db.session.flush()
+        versions = {str(card.id): card.version for card in cards.values()}
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return conflict_response(
+            Card.query.options(undefer(Card.description)).filter(Card.id.in_(card_ids)).all()
+        )
 
-    return jsonify({'message': 'Cards reordered successfully'}), 200
+    return jsonify({'message': 'Cards reordered successfully', 'versions': versions}), 200
@@ -0,0 +1,51 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..models import db, Job
+from ..jobs import cancel_job
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """
+    @api {get} /api/jobs/:id Get background job status
+    @apiName GetJob
+    @apiGroup Jobs
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Number} id Job ID
+    @apiSuccess {String} status queued, running, succeeded, failed or cancelled
+    @apiSuccess {Object} result Job result once it has succeeded
+    @apiSuccess {String} error Error message if it failed
+    """
+    current_user_id = get_jwt_identity()
+    job = Job.query.get_or_404(job_id)
+
+    if job.user_id != current_user_id:
+        return jsonify({'message': 'Access denied'}), 403
+
+    return jsonify(job.to_dict()), 200
+
+@jobs_bp.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel(job_id):
+    """
+    @api {post} /api/jobs/:id/cancel Cancel a background job
+    @apiName CancelJob
+    @apiGroup Jobs
+    @apiHeader {String} Authorization Bearer <access_token>
+    @apiParam {Number} id Job ID
+    @apiSuccess {Object} job Job; a queued job is cancelled at once, a running one at its next checkpoint
+    """
+    current_user_id = get_jwt_identity()
+    job = Job.query.get_or_404(job_id)
+
+    if job.user_id != current_user_id:
+        return jsonify({'message': 'Access denied'}), 403
+
+    if not cancel_job(job_id):
+        return jsonify({'message': 'Job has already finished'}), 409
+    db.session.commit()
+
+    db.session.refresh(job)
+    return jsonify(job.to_dict()), 200
@@ -1,17 +1,29 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm.exc import StaleDataError
 from ..models import db, List, Board
+from ..fieldsets import parse_fieldset, list_load_options, LIST_INCLUDES
+from ..pagination import parse_page
+from .. import counters, activity
+from ..cache import cached_response, cached_stream, invalidate_board
+from ..streaming import json_array
+from ..access import is_member
+from ..idempotency import idempotent
+from ..sharding import use_shard, shard_for_id
+from ..concurrency import expected_version, with_etag, conflict_response
 
 lists_bp = Blueprint('lists', __name__)
 
 @lists_bp.route('/boards/<int:board_id>/lists', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_list(board_id):
     """
     @api {post} /api/boards/:board_id/lists Create a new list
     @apiName CreateList
     @apiGroup Lists
     @apiHeader {String} Authorization Bearer <access_token>
+    @apiHeader {String} Idempotency-Key Client-chosen key; retries with the same key replay the first response (optional)
     @apiParam {Number} board_id Board ID
     @apiParam {String} title List title
     @apiParam {Number} position List position (optional)
@@ -38,6 +50,10 @@ def create_list(board_id):
     )
 
     db.session.add(list)
+    counters.list_added(board_id)
+    invalidate_board(board_id)
+    db.session.flush()
+    activity.record(board_id, current_user_id, 'list.created', list.id, title=list.title)
     db.session.commit()
 
     return jsonify(list.to_dict()), 201
@@ -51,16 +67,43 @@ def get_lists(board_id):
     @apiGroup Lists
     @apiHeader {String} Authorization Bearer <access_token>
     @apiParam {Number} board_id Board ID
-    @apiSuccess {Array} lists List of list objects
+    @apiParam {String} fields List fields to return, comma separated (optional)
+    @apiParam {String} fields[card] Card fields to return (optional, description only when named)
+    @apiParam {String} include Relationships to embed: cards (optional, default cards)
+    @apiParam {Number} limit Page size (optional, enables pagination)
+    @apiParam {String} cursor next_cursor of the previous page (optional, enables pagination)
+    @apiSuccess {Array} lists List of list objects, or {lists, next_cursor} when paginated
     """
     current_user_id = get_jwt_identity()
+    fieldset, error = parse_fieldset(request.args, 'list', LIST_INCLUDES)
+    if error:
+        return jsonify({'message': error}), 400
+
+    page, error = parse_page(request.args)
+    if error:
+        return jsonify({'message': error}), 400
+
     board = Board.query.get_or_404(board_id)
 
-    if not any(member.id == current_user_id for member in board.members):
+    if not is_member(current_user_id, board.id):
         return jsonify({'message': 'Access denied'}), 403
 
-    lists = List.query.filter_by(board_id=board_id).order_by(List.position).all()
-    return jsonify([list.to_dict() for list in lists]), 200
+    query = List.query.filter_by(board_id=board_id).options(
+        *list_load_options(fieldset, List.position)
+    ).order_by(List.position, List.id)
+
+    if page is None:
+        # Lists embed their cards, so the whole board can be large; stream it
+        return cached_stream(
+            ('lists', board.id, board.version, fieldset.key, None),
+            lambda: json_array(query, lambda list: list.to_dict(fieldset))
+        ), 200
+
+    def build():
+        lists, next_cursor = page.split(page.apply(query, List.position, List.id).all())
+        return {'lists': [list.to_dict(fieldset) for list in lists], 'next_cursor': next_cursor}
+
+    return cached_response(('lists', board.id, board.version, fieldset.key, page.key), build), 200
 
 @lists_bp.route('/lists/<int:list_id>', methods=['PUT'])
 @jwt_required()
@@ -73,7 +116,9 @@ def update_list(list_id):
     @apiParam {Number} id List ID
     @apiParam {String} title New list title
     @apiParam {Number} position New position (optional)
+    @apiParam {Number} version Version the change is based on (optional, or send If-Match)
     @apiSuccess {Object} list Updated list object
+    @apiError (409) current Current list when the version does not match
     """
     current_user_id = get_jwt_identity()
     list = List.query.get_or_404(list_id)
@@ -86,15 +131,29 @@ def update_list(list_id):
     if not data:
         return jsonify({'message': 'No data provided'}), 400
 
-    if 'title' in data:
-        list.title = data['title']
-    
-    if 'position' in data:
-        list.position = data['position']
+    version, error = expected_version(data)
+    if error:
+        return jsonify({'message': error}), 400
+    if version is not None and version != list.version:
+        return conflict_response(list)
 
-    db.session.commit()
+    try:
+        if 'title' in data:
+            list.title = data['title']
 
-    return jsonify(list.to_dict()), 200
+        if 'position' in data:
+            list.position = data['position']
+
+        invalidate_board(board.id)
+        activity.record(board.id, current_user_id, 'list.updated', list.id,
+                        title=list.title, fields=sorted(set(data) & {'title', 'position'}))
+        db.session.commit()
+    except StaleDataError:
+        # Someone else updated the list between our read and our write
+        db.session.rollback()
+        return conflict_response(List.query.get_or_404(list_id))
+
+    return with_etag(jsonify(list.to_dict()), list), 200
 
 @lists_bp.route('/lists/<int:list_id>', methods=['DELETE'])
 @jwt_required()
@@ -114,6 +173,10 @@ def delete_list(list_id):
     if not any(member.id == current_user_id for member in board.members):
         return jsonify({'message': 'Access denied'}), 403
 
+    counters.list_removed(list.id, list.board_id)
+    invalidate_board(board.id)
+    activity.record(board.id, current_user_id, 'list.deleted', list.id, title=list.title)
+    # Cards are removed by the database (ON DELETE CASCADE)
     db.session.delete(list)
     db.session.commit()
 
@@ -127,8 +190,10 @@ def reorder_lists():
     @apiName ReorderLists
     @apiGroup Lists
     @apiHeader {String} Authorization Bearer <access_token>
-    @apiParam {Array} orders Array of {id, position} objects
+    @apiParam {Array} orders Array of {id, position, version} objects (version optional)
     @apiSuccess {String} message Success message
+    @apiSuccess {Object} versions New version of each reordered list, by id
+    @apiError (409) current Current lists whose version does not match; nothing is reordered
     """
     current_user_id = get_jwt_identity()
     data = request.get_json()
@@ -136,18 +201,42 @@ def reorder_lists():
     if not data or 'orders' not in data:
         return jsonify({'message': 'Orders array is required'}), 400
 
-    # Verify access to the board
-    first_list = List.query.get_or_404(data['orders'][0]['id'])
+    orders = data['orders']
+
+    # Verify access to the board. All lists must be on it, so on its shard
+    use_shard(shard_for_id(orders[0]['id']))
+    first_list = List.query.get_or_404(orders[0]['id'])
     board = Board.query.get(first_list.board_id)
 
     if not any(member.id == current_user_id for member in board.members):
         return jsonify({'message': 'Access denied'}), 403
 
-    for order in data['orders']:
-        list = List.query.get(order['id'])
-        if list and list.board_id == board.id:
-            list.position = order['position']
-
-    db.session.commit()
-
-    return jsonify({'message': 'Lists reordered successfully'}), 200
+    list_ids = [order['id'] for order in orders]
+    lists = {
+        list.id: list
+        for list in List.query.filter(List.id.in_(list_ids), List.board_id == board.id)
+    }
+
+    stale = [
+        lists[order['id']] for order in orders
+        if order['id'] in lists and 'version' in order and order['version'] != lists[order['id']].version
+    ]
+    if stale:
+        return conflict_response(stale)
+
+    try:
+        for order in orders:
+            list = lists.get(order['id'])
+            if list:
+                list.position = order['position']
+
+        invalidate_board(board.id)
+        activity.record(board.id, current_user_id, 'lists.reordered', list_ids=sorted(lists))
+        db.session.flush()
+        versions = {str(list.id): list.version for list in lists.values()}
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return conflict_response(List.query.filter(List.id.in_(list_ids)).all())
+
+    return jsonify({'message': 'Lists reordered successfully', 'versions': versions}), 200
@@ -0,0 +1,64 @@
+import logging
+from flask import Blueprint, jsonify
+from ..models import db
+from ..cache import response_cache
+from ..bus import bus
+from .. import access
+from .admin import admin_required
+
+logger = logging.getLogger(__name__)
+
+meta_bp = Blueprint('meta', __name__)
+
+@meta_bp.route('/cache/stats', methods=['GET'])
+@admin_required
+def get_cache_stats():
+    """
+    @api {get} /api/cache/stats Get response cache metrics
+    @apiName GetCacheStats
+    @apiGroup Meta
+    @apiHeader {String} Authorization Bearer <access_token> of an admin user
+    @apiSuccess {Object} local Hits, misses and evictions of this process's LRU tier
+    @apiSuccess {Object} shared Hits, misses and errors of the shared tier (if configured)
+    @apiSuccess {Object} bus Invalidation events published and received by this process
+    """
+    stats = response_cache.stats()
+    stats['bus'] = dict(bus.stats(), memberships=len(access.memberships), tokens=len(access.token_states))
+    return jsonify(stats), 200
+
+@meta_bp.route('/health/live', methods=['GET'])
+def liveness():
+    """
+    @api {get} /api/health/live Liveness probe
+    @apiName Liveness
+    @apiGroup Meta
+    @apiSuccess {String} status Always "ok" while the process is serving requests
+    """
+    return jsonify({'status': 'ok'}), 200
+
+@meta_bp.route('/health/ready', methods=['GET'])
+def readiness():
+    """
+    @api {get} /api/health/ready Readiness probe
+    @apiName Readiness
+    @apiGroup Meta
+    @apiSuccess {String} status "ready" when every configured database answers
+    @apiSuccess {Object} databases Per database (primary, replica) "ok" or "unavailable"
+    @apiError (503) status "unavailable" if any database does not answer
+    """
+    databases = {}
+    for bind, engine in db.engines.items():
+        name = bind or 'primary'
+        try:
+            with engine.connect() as connection:
+                connection.execute(db.text('SELECT 1'))
+            databases[name] = 'ok'
+        except Exception:
+            logger.exception(f"Readiness check failed for the {name} database")
+            databases[name] = 'unavailable'
+
+    ready = all(state == 'ok' for state in databases.values())
+    return jsonify({
+        'status': 'ready' if ready else 'unavailable',
+        'databases': databases
+    }), 200 if ready else 503
@@ -0,0 +1,224 @@
+import csv
+import io
+import logging
+import random
+from array import array
+from datetime import datetime, timedelta
+from itertools import islice
+from werkzeug.security import generate_password_hash
+from .models import db, User, Board, UserBoard, BoardDirectory, List, Card
+from .sharding import sync_users
+
+logger = logging.getLogger(__name__)
+
+# Generated rows are dated within the year before this, so a given seed
+# always produces the same data
+BASE_DATE = datetime(2024, 1, 1)
+
+WORDS = (
+    'api', 'backlog', 'billing', 'bug', 'cache', 'client', 'deploy', 'design',
+    'docs', 'email', 'export', 'feature', 'fix', 'import', 'invoice', 'login',
+    'metrics', 'mobile', 'onboarding', 'payment', 'q3', 'release', 'report',
+    'review', 'search', 'security', 'signup', 'sprint', 'support', 'test', 'ui'
+)
+LIST_TITLES = ('Backlog', 'To Do', 'In Progress', 'Review', 'Blocked', 'Done', 'Ideas', 'Later')
+
+def parse_range(text):
+    """
+    Read a count distribution: 'N' for exactly N, or 'A-B' for a uniform
+    choice between A and B inclusive. Returns (low, high).
+    """
+    low, _, high = text.partition('-')
+    low, high = int(low), int(high or low)
+    if low < 0 or high < low:
+        raise ValueError(f"Invalid range '{text}'")
+    return low, high
+
+def _words(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+def _timestamp(rng):
+    return BASE_DATE - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+
+class SeedPlan:
+    """
+    How many lists each board gets and how many cards each list gets,
+    drawn up front so board and list counters can be written with the rows.
+    Cards are spread over lists with Pareto weights: with the default skew
+    of 1.16 about a fifth of the lists hold four fifths of the cards, as on
+    real boards. A skew of 0 spreads them evenly.
+    """
+
+    def __init__(self, seed, boards, cards, lists_per_board, card_skew):
+        rng = random.Random(f'{seed}:plan')
+        self.lists_per_board = array('l', (rng.randint(*lists_per_board) for _ in range(boards)))
+        total_lists = sum(self.lists_per_board)
+        if cards and not total_lists:
+            raise ValueError('Cards need at least one list')
+
+        weights = [rng.paretovariate(card_skew) if card_skew else 1.0 for _ in range(total_lists)]
+        scale = cards / sum(weights) if weights else 0
+        self.cards_per_list = array('l', (int(weight * scale) for weight in weights))
+        # Hand the cards lost to rounding down to randomly chosen lists
+        for _ in range(cards - sum(self.cards_per_list)):
+            self.cards_per_list[rng.randrange(total_lists)] += 1
+
+        self.cards_per_board = array('l')
+        start = 0
+        for count in self.lists_per_board:
+            self.cards_per_board.append(sum(self.cards_per_list[start:start + count]))
+            start += count
+
+def _next_ids():
+    """The first free id of each table the seed writes to."""
+    return {
+        model: (db.session.execute(db.select(db.func.max(model.id))).scalar() or 0) + 1
+        for model in (User, Board, List, Card)
+    }
+
+def _copy_rows(table, columns, rows, dialect):
+    # COPY skips SQLAlchemy's type processing, so apply custom column types
+    # (e.g. compressed descriptions) here and send bytes in bytea hex form
+    types = [table.c[name].type for name in columns]
+    if not any(isinstance(type_, db.TypeDecorator) for type_ in types):
+        return rows
+    converted = []
+    for row in rows:
+        values = []
+        for type_, value in zip(types, row):
+            if isinstance(type_, db.TypeDecorator):
+                value = type_.process_bind_param(value, dialect)
+            values.append('\\x' + value.hex() if isinstance(value, bytes) else value)
+        converted.append(values)
+    return converted
+
+def _write_rows(table, columns, rows, batch_size, use_copy):
+    """
+    Insert rows (tuples in column order) batch_size at a time, one
+    transaction per batch. On PostgreSQL use_copy streams each batch with
+    COPY instead of a multi-row INSERT.
+    """
+    written = 0
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return written
+        with db.engine.begin() as conn:
+            if use_copy:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(_copy_rows(table, columns, batch, conn.dialect))
+                buffer.seek(0)
+                cursor = conn.connection.cursor()
+                # An explicit NULL marker so empty strings load as '' rather than NULL
+                cursor.copy_expert(
+                    f'COPY "{table.name}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')',
+                    buffer
+                )
+                cursor.close()
+            else:
+                conn.execute(db.insert(table), [dict(zip(columns, row)) for row in batch])
+        written += len(batch)
+
+def _reset_sequences():
+    # Rows were written with explicit ids, so move the id sequences past them
+    with db.engine.begin() as conn:
+        for table in ('user', 'board', 'list', 'card'):
+            conn.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM \"{table}\"), 1))"
+            ))
+
+def seed(seed=0, users=100, boards=1000, cards=100000, lists_per_board=(3, 8),
+         members_per_board=(1, 4), card_skew=1.16, description_ratio=0.3,
+         prefix='seed', password='password', batch_size=5000, use_copy=None):
+    """
+    Generate users, boards, memberships, lists and cards straight into the
+    database with bulk inserts (COPY on PostgreSQL unless use_copy is
+    False). The same arguments always produce the same rows, appended after
+    any existing data. Every user gets the username {prefix}{n}, an email
+    at example.com and the given password. Returns the number of rows
+    written per table.
+
+    Rows are written with explicit ids from the current maximum id of each
+    table, so nothing else may write to the database while it runs. All
+    boards go to the primary database; the users are copied to any other
+    shards.
+    """
+    if users < 1 and boards:
+        raise ValueError('Boards need at least one user')
+    taken = db.session.execute(
+        db.select(User.id).where(User.username.like(f'{prefix}%')).limit(1)
+    ).first()
+    if taken:
+        raise ValueError(f"Users named '{prefix}...' already exist, choose another prefix")
+
+    is_postgres = db.engine.dialect.name == 'postgresql'
+    use_copy = is_postgres if use_copy is None else use_copy and is_postgres
+    plan = SeedPlan(seed, boards, cards, lists_per_board, card_skew)
+    ids = _next_ids()
+    db.session.commit()
+
+    def write(model, columns, rows):
+        written = _write_rows(model.__table__, columns, rows, batch_size, use_copy)
+        logger.info(f"Seeded {written} {model.__tablename__} rows")
+        return written
+
+    # Hashing is deliberately slow, so every seeded user shares one hash
+    password_hash = generate_password_hash(password)
+
+    def user_rows():
+        for n in range(users):
+            yield (ids[User] + n, f'{prefix}{n}', f'{prefix}{n}@example.com', password_hash, False)
+
+    def board_rows():
+        rng = random.Random(f'{seed}:boards')
+        for n in range(boards):
+            yield (ids[Board] + n, f'{_words(rng, 1, 3).title()} {n}', _timestamp(rng),
+                   plan.lists_per_board[n], plan.cards_per_board[n], 1, False)
+
+    def membership_rows():
+        rng = random.Random(f'{seed}:members')
+        for n in range(boards):
+            count = min(rng.randint(*members_per_board), users)
+            for member in rng.sample(range(users), count):
+                yield (ids[User] + member, ids[Board] + n)
+
+    def list_rows():
+        rng = random.Random(f'{seed}:lists')
+        list_id = ids[List]
+        for n, count in enumerate(plan.lists_per_board):
+            for position in range(count):
+                title = LIST_TITLES[position] if position < len(LIST_TITLES) else _words(rng, 1, 2).title()
+                yield (list_id, title, ids[Board] + n, position, plan.cards_per_list[list_id - ids[List]], 1)
+                list_id += 1
+
+    def card_rows():
+        rng = random.Random(f'{seed}:cards')
+        card_id = ids[Card]
+        list_index = 0
+        for n, list_count in enumerate(plan.lists_per_board):
+            for _ in range(list_count):
+                for position in range(plan.cards_per_list[list_index]):
+                    created_at = _timestamp(rng)
+                    description = _words(rng, 10, 60).capitalize() + '.' if rng.random() < description_ratio else ''
+                    yield (card_id, _words(rng, 2, 8).capitalize(), description, ids[List] + list_index,
+                           ids[Board] + n, position, created_at, created_at, 1)
+                    card_id += 1
+                list_index += 1
+
+    counts = {
+        'users': write(User, ('id', 'username', 'email', 'password_hash', 'is_admin'), user_rows()),
+        'boards': write(Board, ('id', 'title', 'created_at', 'list_count', 'card_count', 'version', 'is_template'),
+                        board_rows()),
+        'memberships': write(UserBoard, ('user_id', 'board_id'), membership_rows()),
+        'directory': write(BoardDirectory, ('user_id', 'board_id'), membership_rows()),
+        'lists': write(List, ('id', 'title', 'board_id', 'position', 'card_count', 'version'), list_rows()),
+        'cards': write(Card, ('id', 'title', 'description', 'list_id', 'board_id', 'position',
+                              'created_at', 'updated_at', 'version'), card_rows()),
+    }
+    if is_postgres:
+        _reset_sequences()
+    # Boards stay on the primary, but every shard needs the new users
+    sync_users(batch_size)
+    return counts
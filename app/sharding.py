@@ -0,0 +1,312 @@
+import itertools
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, g, request, abort
+from sqlalchemy import event
+from .models import db, User, BoardDirectory
+from .replica import RoutingSession
+
+logger = logging.getLogger(__name__)
+
+# Tables that live on the shard of their board (marked in app.models). The
+# user table is copied to every shard so memberships keep their foreign keys
+# and can be joined locally; it is only written on the primary.
+SHARDED_TABLES = [table for table in db.metadata.sorted_tables if table.info.get('sharded')]
+
+# Tables whose ids encode their shard, see shard_for_id
+RANGED_TABLES = ('board', 'list', 'card', 'activity')
+
+# URL parameters that identify the shard a request works on
+SHARD_VIEW_ARGS = ('board_id', 'list_id', 'card_id')
+
+def shard_count():
+    return 1 + len(current_app.config['SHARD_DATABASE_URLS'])
+
+def shard_bind(shard):
+    """Bind key of a shard. Shard 0 is the primary database."""
+    return None if shard == 0 else f'shard{shard}'
+
+def shard_engine(shard):
+    return db.engines[shard_bind(shard)]
+
+def shard_for_id(id):
+    """
+    The shard holding a board, list, card or activity entry. Each shard
+    hands out ids from its own range of SHARD_ID_SPAN, starting after
+    shard * SHARD_ID_SPAN, so any id can be routed without a lookup.
+    """
+    return (id - 1) // current_app.config['SHARD_ID_SPAN']
+
+def use_shard(shard):
+    """
+    Route queries on sharded tables to shard for the rest of the app
+    context. A shard that does not exist means the object does not either.
+    """
+    if not 0 <= shard < shard_count():
+        abort(404)
+    g.shard = shard
+
+_next_shard = itertools.count()
+
+def place_board():
+    """
+    Pick the shard for a new board (round robin in each process) and route
+    to it. Lists and cards always follow their board. Inside a batch every
+    board goes to the batch's shard (see app.routes.batch).
+    """
+    shard = g.get('batch_shard')
+    if shard is None:
+        shard = next(_next_shard) % shard_count()
+        if db.session.info.get('defer_commit'):
+            g.batch_shard = shard
+    use_shard(shard)
+    return shard
+
+def shard_of_view_args(view_args):
+    """The shard a request with these URL parameters works on, or None."""
+    for arg in SHARD_VIEW_ARGS:
+        if view_args and arg in view_args:
+            return shard_for_id(view_args[arg])
+    return None
+
+def route_request():
+    # Sub-requests of a batch share the batch's g, so always reset the shard
+    g.shard = None
+    shard = shard_of_view_args(request.view_args)
+    if shard is not None:
+        use_shard(shard)
+
+def prepare_shards(app):
+    """
+    Create the sharded tables on every extra shard and start their id
+    sequences at the shard's range. Safe to run on every start.
+    """
+    span = app.config['SHARD_ID_SPAN']
+    for shard in range(1, shard_count()):
+        engine = shard_engine(shard)
+        db.metadata.create_all(engine, tables=SHARDED_TABLES)
+        with engine.begin() as conn:
+            for table in RANGED_TABLES:
+                params = {'table': table, 'base': shard * span}
+                if engine.dialect.name == 'postgresql':
+                    conn.execute(db.text(
+                        "SELECT setval(pg_get_serial_sequence(:table, 'id'), :base) WHERE COALESCE("
+                        "pg_sequence_last_value(pg_get_serial_sequence(:table, 'id')::regclass), 0) < :base"
+                    ), params)
+                else:
+                    # The sharded tables are AUTOINCREMENT on SQLite, so sqlite_sequence exists
+                    conn.execute(db.text(
+                        'INSERT INTO sqlite_sequence (name, seq) SELECT :table, 0 '
+                        'WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :table)'
+                    ), params)
+                    conn.execute(db.text(
+                        'UPDATE sqlite_sequence SET seq = :base WHERE name = :table AND seq < :base'
+                    ), params)
+
+def init_sharding(app):
+    """
+    Set up the shards listed in SHARD_DATABASE_URLS (bound as shard1,
+    shard2, ...) and route each request to the shard named by its URL.
+    With no extra shards everything stays on the primary, as before.
+    """
+    app.before_request(route_request)
+    if app.config['SHARD_DATABASE_URLS']:
+        with app.app_context():
+            prepare_shards(app)
+
+def replicate_users(user_ids):
+    """
+    Copy the given users from the primary to every other shard, inside the
+    current transaction. Call after creating users.
+    """
+    if shard_count() == 1 or not user_ids:
+        return
+    rows = [
+        dict(row._mapping) for row in db.session.execute(
+            db.select(*User.__table__.columns).where(User.id.in_(user_ids)),
+            bind_arguments={'bind': shard_engine(0)}
+        )
+    ]
+    for shard in range(1, shard_count()):
+        db.session.execute(db.insert(User.__table__), rows, bind_arguments={'bind': shard_engine(shard)})
+    logger.info(f"Replicated {len(rows)} users to {shard_count() - 1} shards")
+
+def delete_replicated_users(user_ids):
+    for shard in range(1, shard_count()):
+        db.session.execute(
+            db.delete(User.__table__).where(User.__table__.c.id.in_(user_ids)),
+            bind_arguments={'bind': shard_engine(shard)}
+        )
+
+def sync_users(batch_size=1000):
+    """
+    Copy every user the primary has and a shard lacks, e.g. after adding a
+    shard. Returns the number of rows copied.
+    """
+    copied = 0
+    for shard in range(1, shard_count()):
+        engine = shard_engine(shard)
+        with engine.connect() as conn:
+            present = set(conn.execute(db.select(User.__table__.c.id)).scalars())
+        missing = [
+            id for id in db.session.execute(db.select(User.id), bind_arguments={'bind': shard_engine(0)}).scalars()
+            if id not in present
+        ]
+        for start in range(0, len(missing), batch_size):
+            rows = [
+                dict(row._mapping) for row in db.session.execute(
+                    db.select(*User.__table__.columns).where(User.id.in_(missing[start:start + batch_size])),
+                    bind_arguments={'bind': shard_engine(0)}
+                )
+            ]
+            with engine.begin() as conn:
+                conn.execute(db.insert(User.__table__), rows)
+            copied += len(rows)
+    return copied
+
+# Board directory: the user -> board mapping kept on the primary, so a
+# user's boards can be found without asking every shard. Readers always
+# check membership on the shard, so the directory may list a board the
+# user is not in, but it must never miss one. For a board on another shard
+# the two databases commit separately, so entries are added before the
+# board's transaction (and taken back if it rolls back) and removed after
+# it commits. A crash in between leaves a harmless extra entry.
+
+def _entries(user_id, board_id):
+    criteria = [BoardDirectory.board_id == board_id]
+    if user_id is not None:
+        criteria.append(BoardDirectory.user_id == user_id)
+    return db.delete(BoardDirectory).where(*criteria)
+
+def directory_add(user_id, board_id):
+    if shard_for_id(board_id) == 0:
+        db.session.execute(db.insert(BoardDirectory).values(user_id=user_id, board_id=board_id))
+        return
+    # Committed on the primary's own connection right away; an entry left
+    # by an earlier rolled-back attempt is reused
+    with shard_engine(0).begin() as conn:
+        conn.execute(
+            db.insert(BoardDirectory).from_select(
+                ['user_id', 'board_id'],
+                db.select(db.literal(user_id), db.literal(board_id)).where(
+                    ~db.select(BoardDirectory.user_id)
+                    .where(BoardDirectory.user_id == user_id, BoardDirectory.board_id == board_id)
+                    .exists()
+                )
+            )
+        )
+    db.session.info.setdefault('directory_undo', []).append((user_id, board_id))
+
+def directory_remove(user_id, board_id):
+    if shard_for_id(board_id) == 0:
+        db.session.execute(_entries(user_id, board_id))
+    else:
+        db.session.info.setdefault('directory_removals', []).append((user_id, board_id))
+
+def directory_remove_board(board_id):
+    directory_remove(None, board_id)
+
+def _apply_to_directory(entries, action):
+    try:
+        with shard_engine(0).begin() as conn:
+            for user_id, board_id in entries:
+                conn.execute(_entries(user_id, board_id))
+    except Exception:
+        logger.exception(f"Could not {action} board directory entries {entries}")
+
+@event.listens_for(RoutingSession, 'after_commit')
+def apply_directory_removals(session):
+    session.info.pop('directory_undo', None)
+    removals = session.info.pop('directory_removals', None)
+    if removals:
+        _apply_to_directory(removals, 'remove')
+
+@event.listens_for(RoutingSession, 'after_soft_rollback')
+def undo_directory_additions(session, previous_transaction):
+    session.info.pop('directory_removals', None)
+    additions = session.info.pop('directory_undo', None)
+    if additions:
+        _apply_to_directory(additions, 'take back')
+
+def user_shards(user_id):
+    """The shards holding at least one of the user's boards, in order."""
+    board_ids = db.session.execute(
+        db.select(BoardDirectory.board_id).where(BoardDirectory.user_id == user_id)
+    ).scalars()
+    return sorted({shard_for_id(board_id) for board_id in board_ids})
+
+_fan_out_pools = {}
+_fan_out_lock = threading.Lock()
+
+def _pool():
+    # One pool per process: threads do not survive a fork
+    with _fan_out_lock:
+        pool = _fan_out_pools.get(os.getpid())
+        if pool is None:
+            pool = _fan_out_pools[os.getpid()] = ThreadPoolExecutor(
+                max_workers=current_app.config['SHARD_FAN_OUT_WORKERS'], thread_name_prefix='shard-fan-out'
+            )
+        return pool
+
+_DONE = object()
+
+def fan_out(shards, produce, buffer=2):
+    """
+    Run produce() on each shard in parallel, each in its own app context
+    (and so its own session) routed to that shard, and yield what they
+    yield, one shard after another in the order given. Each shard may run
+    at most buffer items ahead of the consumer, which keeps memory bounded.
+    """
+    if db.session.info.get('defer_commit'):
+        # Inside a batch only this session sees the batch's writes, so ask
+        # the shards one by one from here
+        previous = g.get('shard')
+        try:
+            for shard in shards:
+                g.shard = shard
+                yield from produce()
+        finally:
+            g.shard = previous
+        return
+
+    app = current_app._get_current_object()
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=buffer) for _ in shards]
+
+    def put(out, item):
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run(shard, out):
+        with app.app_context():
+            g.shard = shard
+            try:
+                for item in produce():
+                    if not put(out, item):
+                        return
+                put(out, _DONE)
+            except Exception as e:
+                put(out, e)
+
+    pool = _pool()
+    for shard, out in zip(shards, queues):
+        pool.submit(run, shard, out)
+    try:
+        for out in queues:
+            while True:
+                item = out.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        stop.set()
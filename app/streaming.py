@@ -0,0 +1,52 @@
+from flask import current_app, stream_with_context
+from .models import db
+
+def json_items(query, serialize, batch_size=None):
+    """
+    Yield the JSON of serialize(row) for every row of query, comma
+    separated, one chunk per batch_size rows (STREAM_BATCH_SIZE by
+    default). Rows are fetched with yield_per, so only one batch of objects
+    is in memory at a time, and the relationships selectinload'ed by the
+    query are loaded per batch too.
+    """
+    batch_size = batch_size or current_app.config['STREAM_BATCH_SIZE']
+    def dumps(value):
+        # Compact, like jsonify outside debug mode
+        return current_app.json.dumps(value, separators=(',', ':'))
+
+    batch = []
+    for row in query.yield_per(batch_size):
+        batch.append(dumps(serialize(row)))
+        if len(batch) == batch_size:
+            yield ','.join(batch)
+            batch = []
+    if batch:
+        yield ','.join(batch)
+
+def join_items(chunks):
+    """Wrap chunks from json_items (from one or more queries) into a JSON array."""
+    separator = '['
+    for chunk in chunks:
+        yield separator + chunk
+        separator = ','
+    if separator == '[':
+        yield '['
+    yield ']\n'
+
+def json_array(query, serialize, batch_size=None):
+    """The JSON array of serialize(row) for every row of query, in chunks."""
+    return join_items(json_items(query, serialize, batch_size))
+
+def stream_response(chunks):
+    """
+    Response that sends chunks as they are produced. The request (and its
+    database session) stays open until the last chunk is sent, so the
+    status and headers go out before the query has finished: an error part
+    way through can only cut the body short.
+    """
+    if db.session.info.get('defer_commit'):
+        # Batch operations read the body back, so build it in full
+        chunks = ''.join(chunks)
+    else:
+        chunks = stream_with_context(chunks)
+    return current_app.response_class(chunks, mimetype=current_app.json.mimetype)
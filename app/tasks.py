@@ -0,0 +1,142 @@
+import logging
+from collections import defaultdict
+from flask import current_app
+from .models import db, User, Board, List, Card
+from .jobs import job_handler
+from .duplicate import copy_board
+from .sharding import use_shard, shard_for_id, place_board, directory_add
+
+logger = logging.getLogger(__name__)
+
+# Cards inserted per statement when importing a board
+IMPORT_BATCH_SIZE = 1000
+
+def delete_board_in_batches(board_id, batch_size):
+    """
+    Delete a board's cards in fixed-size batches, committing after each one,
+    then delete the board itself and let ON DELETE CASCADE remove its lists.
+    Keeps every transaction short so a huge board never holds locks for long.
+    """
+    deleted = 0
+    while True:
+        batch = db.select(Card.id).where(Card.board_id == board_id).limit(batch_size)
+        result = db.session.execute(
+            db.delete(Card).where(Card.id.in_(batch)),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            break
+
+    db.session.execute(
+        db.delete(Board).where(Board.id == board_id),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+    logger.info(f"Deleted board {board_id} with {deleted} cards")
+    return deleted
+
+@job_handler('delete_board')
+def delete_board_job(job, board_id):
+    # Not cancellable once started: the board's memberships are already gone
+    use_shard(shard_for_id(board_id))
+    deleted = delete_board_in_batches(board_id, current_app.config['BOARD_DELETE_BATCH_SIZE'])
+    return {'board_id': board_id, 'deleted_cards': deleted}
+
+@job_handler('export_board')
+def export_board(job, board_id):
+    """
+    Serialize a board's lists and cards into the format import_board reads.
+    """
+    use_shard(shard_for_id(board_id))
+    board = db.session.get(Board, board_id)
+    if board is None:
+        raise LookupError(f'Board {board_id} no longer exists')
+
+    lists = db.session.execute(
+        db.select(List.id, List.title, List.position)
+        .where(List.board_id == board_id)
+        .order_by(List.position, List.id)
+    ).all()
+    job.check_cancelled()
+
+    cards = defaultdict(list)
+    rows = db.session.execute(
+        db.select(Card.list_id, Card.title, Card.description, Card.position)
+        .where(Card.board_id == board_id)
+        .order_by(Card.position, Card.id)
+        .execution_options(yield_per=IMPORT_BATCH_SIZE)
+    )
+    for row in rows:
+        cards[row.list_id].append({
+            'title': row.title,
+            'description': row.description,
+            'position': row.position
+        })
+
+    return {
+        'title': board.title,
+        'lists': [
+            {'title': list.title, 'position': list.position, 'cards': cards[list.id]}
+            for list in lists
+        ]
+    }
+
+@job_handler('import_board')
+def import_board(job, user_id, data):
+    """
+    Create a board owned by user_id from an export_board document. Runs in
+    a single transaction, so a failed or cancelled import leaves nothing
+    behind.
+    """
+    place_board()
+    lists = data.get('lists', [])
+    board = Board(
+        title=data['title'],
+        created_by=user_id,
+        list_count=len(lists),
+        card_count=sum(len(list.get('cards', [])) for list in lists)
+    )
+    board.members.append(db.session.get(User, user_id))
+    db.session.add(board)
+
+    new_lists = [
+        List(
+            title=list['title'],
+            position=list.get('position', index),
+            card_count=len(list.get('cards', [])),
+            board=board
+        )
+        for index, list in enumerate(lists)
+    ]
+    db.session.add_all(new_lists)
+    db.session.flush()
+    directory_add(user_id, board.id)
+
+    rows = [
+        {
+            'title': card['title'],
+            'description': card.get('description', ''),
+            'position': card.get('position', index),
+            'list_id': new_list.id,
+            'board_id': board.id
+        }
+        for list, new_list in zip(lists, new_lists)
+        for index, card in enumerate(list.get('cards', []))
+    ]
+    for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+        job.check_cancelled()
+        db.session.execute(db.insert(Card), rows[start:start + IMPORT_BATCH_SIZE])
+
+    db.session.commit()
+    logger.info(f"Imported board {board.id} with {len(rows)} cards")
+    return {'board_id': board.id}
+
+@job_handler('duplicate_board')
+def duplicate_board(job, board_id, title, user_id):
+    use_shard(shard_for_id(board_id))
+    board = copy_board(board_id, title, user_id)
+    db.session.commit()
+    logger.info(f"Duplicated board {board_id} into {board.id}")
+    return {'board_id': board.id}
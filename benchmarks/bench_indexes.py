@@ -0,0 +1,178 @@
+"""
+Benchmark the hot list/card access paths as the tables grow.
+
+Fills a scratch database with boards, lists and cards in steps and times the
+queries issued by get_lists, get_cards, create_list/create_card (the
+MAX(position) append) and the board membership lookup at every step. Run it
+once with the schema indexes and once with --no-indexes to compare:
+
+    python benchmarks/bench_indexes.py --sizes 10000,100000,1000000
+    python benchmarks/bench_indexes.py --sizes 10000,100000,1000000 --no-indexes
+
+Timings are the mean per query in microseconds; with the indexes in place
+they should stay roughly flat as the card table grows.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, func, insert, select, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import db, User, Board, UserBoard, List, Card  # noqa: E402
+
+INDEX_NAMES = [
+    ('ix_card_list_id_position', 'card'),
+    ('ix_list_board_id_position', 'list'),
+    ('ix_user_board_board_id', 'user_board'),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', help='Database URL (default: a scratch SQLite file)')
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='Comma separated card counts to measure at')
+    parser.add_argument('--lists-per-board', type=int, default=10)
+    parser.add_argument('--cards-per-list', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='Queries timed per operation and size')
+    parser.add_argument('--no-indexes', action='store_true',
+                        help='Drop the secondary indexes before measuring')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+
+def grow(conn, state, target_cards, args):
+    """Insert boards, lists and cards until the card table holds target_cards rows."""
+    now = datetime.utcnow()
+    user_id = state['user_id']
+    while state['cards'] < target_cards:
+        board_id = conn.execute(
+            insert(Board).values(title=f"Board {state['boards']}", created_at=now)
+        ).inserted_primary_key[0]
+        conn.execute(insert(UserBoard).values(user_id=user_id, board_id=board_id))
+        state['boards'] += 1
+        state['board_ids'].append(board_id)
+
+        list_rows = [
+            {'title': f'List {i}', 'board_id': board_id, 'position': i}
+            for i in range(args.lists_per_board)
+        ]
+        conn.execute(insert(List), list_rows)
+        list_ids = conn.execute(
+            select(List.id).where(List.board_id == board_id)
+        ).scalars().all()
+        state['list_ids'].extend(list_ids)
+        state['list_boards'].update(dict.fromkeys(list_ids, board_id))
+
+        card_rows = []
+        for list_id in list_ids:
+            for position in range(args.cards_per_list):
+                card_rows.append({
+                    'title': f'Card {position}',
+                    'description': 'x' * 64,
+                    'list_id': list_id,
+                    'board_id': board_id,
+                    'position': position,
+                    'created_at': now,
+                    'updated_at': now,
+                })
+        conn.execute(insert(Card), card_rows)
+        state['cards'] += len(card_rows)
+
+
+def timed(repeat, fn):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def measure(conn, state, args, rng):
+    board_ids = state['board_ids']
+    list_ids = state['list_ids']
+    now = datetime.utcnow()
+
+    def get_lists():
+        board_id = rng.choice(board_ids)
+        conn.execute(
+            select(List).where(List.board_id == board_id).order_by(List.position)
+        ).all()
+
+    def get_cards():
+        list_id = rng.choice(list_ids)
+        conn.execute(
+            select(Card).where(Card.list_id == list_id).order_by(Card.position)
+        ).all()
+
+    def append_card():
+        list_id = rng.choice(list_ids)
+        max_position = conn.execute(
+            select(func.max(Card.position)).where(Card.list_id == list_id)
+        ).scalar()
+        conn.execute(insert(Card).values(
+            title='Appended', description='', list_id=list_id,
+            board_id=state['list_boards'][list_id],
+            position=(max_position if max_position is not None else -1) + 1,
+            created_at=now, updated_at=now,
+        ))
+
+    def board_members():
+        board_id = rng.choice(board_ids)
+        conn.execute(
+            select(UserBoard.user_id).where(UserBoard.board_id == board_id)
+        ).all()
+
+    return {
+        'get_lists': timed(args.repeat, get_lists),
+        'get_cards': timed(args.repeat, get_cards),
+        'append_card': timed(args.repeat, append_card),
+        'board_members': timed(args.repeat, board_members),
+    }
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    url = args.url
+    if not url:
+        path = os.path.join(tempfile.mkdtemp(prefix='taskflow-bench-'), 'bench.db')
+        url = f'sqlite:///{path}'
+    engine = create_engine(url)
+
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        if args.no_indexes:
+            for name, table in INDEX_NAMES:
+                conn.execute(text(f'DROP INDEX {name}'))
+        user_id = conn.execute(insert(User).values(
+            username='bench', email='bench@example.com', password_hash='x'
+        )).inserted_primary_key[0]
+
+    state = {'user_id': user_id, 'boards': 0, 'cards': 0,
+             'board_ids': [], 'list_ids': [], 'list_boards': {}}
+
+    print(f"indexes: {'off' if args.no_indexes else 'on'}  url: {url}")
+    header = f"{'cards':>10} {'get_lists':>12} {'get_cards':>12} {'append_card':>12} {'board_members':>14}"
+    print(header)
+    print('-' * len(header))
+    for size in sizes:
+        with engine.begin() as conn:
+            grow(conn, state, size, args)
+        with engine.begin() as conn:
+            result = measure(conn, state, args, rng)
+        print(f"{state['cards']:>10} {result['get_lists']:>12.1f} {result['get_cards']:>12.1f} "
+              f"{result['append_card']:>12.1f} {result['board_members']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
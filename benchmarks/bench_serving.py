@@ -0,0 +1,159 @@
+"""
+Compare request throughput of the development server and the production
+gunicorn setup.
+
+Starts the API under `flask run` (what the Dockerfile used to run) and under
+gunicorn with gunicorn.conf.py against the same scratch SQLite database,
+seeds a board through the API, then drives a read-heavy mix of requests from
+concurrent clients for a fixed time against each server:
+
+    python benchmarks/bench_serving.py
+    python benchmarks/bench_serving.py --clients 32 --workers 4 --threads 8
+
+Reports requests per second and p50/p99 latency in milliseconds. The client
+runs on the same machine, so absolute numbers are pessimistic; compare the
+two rows with each other.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--servers', default='flask,gunicorn',
+                        help='Comma separated servers to measure (flask, gunicorn)')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of load per server')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent client threads')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() * 2 + 1,
+                        help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--cards', type=int, default=50, help='Cards on the seeded board')
+    return parser.parse_args()
+
+
+def server_command(name, args):
+    if name == 'flask':
+        return [sys.executable, '-m', 'flask', '--app', 'run.py', 'run', '--port', str(args.port)]
+    if name == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                '--bind', f'127.0.0.1:{args.port}',
+                '--workers', str(args.workers), '--threads', str(args.threads),
+                'wsgi:app']
+    raise SystemExit(f'Unknown server: {name}')
+
+
+def wait_until_ready(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{base_url}/health/ready', timeout=1).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit('Server did not become ready')
+
+
+def seed(base_url, cards):
+    """Create a user and a board with one list of cards; return (headers, paths)."""
+    credentials = {'username': 'bench', 'email': 'bench@example.com', 'password': 'bench'}
+    requests.post(f'{base_url}/auth/register', json=credentials)
+    token = requests.post(f'{base_url}/auth/login', json=credentials).json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    board_id = requests.post(f'{base_url}/boards', json={'title': 'Bench'}, headers=headers).json()['id']
+    list_id = requests.post(f'{base_url}/boards/{board_id}/lists', json={'title': 'List'},
+                            headers=headers).json()['id']
+    card_ids = [
+        requests.post(f'{base_url}/lists/{list_id}/cards', json={'title': f'Card {i}'},
+                      headers=headers).json()['id']
+        for i in range(cards)
+    ]
+
+    paths = [
+        f'/boards/{board_id}',
+        f'/lists/{list_id}/cards',
+        f'/cards/{card_ids[0]}',
+        '/boards',
+    ]
+    return headers, paths
+
+
+def run_load(base_url, headers, paths, clients, duration):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(index):
+        nonlocal errors
+        session = requests.Session()
+        session.headers.update(headers)
+        mine = []
+        failed = 0
+        i = index
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            response = session.get(base_url + paths[i % len(paths)])
+            mine.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                failed += 1
+            i += 1
+        with lock:
+            latencies.extend(mine)
+            errors += failed
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / duration,
+        'p50': latencies[len(latencies) // 2] * 1000,
+        'p99': latencies[int(len(latencies) * 0.99)] * 1000,
+        'errors': errors,
+    }
+
+
+def measure(name, args):
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    env = dict(os.environ, FLASK_CONFIG='testing', TEST_DATABASE_URL=f'sqlite:///{database}')
+    process = subprocess.Popen(server_command(name, args), cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{args.port}/api'
+    try:
+        wait_until_ready(base_url)
+        headers, paths = seed(base_url, args.cards)
+        run_load(base_url, headers, paths, args.clients, 1)  # warm up
+        return run_load(base_url, headers, paths, args.clients, args.duration)
+    finally:
+        process.terminate()
+        process.wait()
+        os.remove(database)
+
+
+def main():
+    args = parse_args()
+    print(f'{args.clients} clients, {args.duration:g}s per server, '
+          f'gunicorn {args.workers} workers x {args.threads} threads')
+    print(f'{"server":<10} {"requests":>9} {"req/s":>9} {"p50 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for name in args.servers.split(','):
+        result = measure(name.strip(), args)
+        print(f'{name:<10} {result["requests"]:>9} {result["rps"]:>9.1f} '
+              f'{result["p50"]:>8.1f} {result["p99"]:>8.1f} {result["errors"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -12,6 +12,82 @@ class Config:
     # Database
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql://taskflow:changeme@db:5432/taskflow')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Board shards after the primary database (shard 0), comma separated.
+    # Boards with their lists, cards and memberships are spread over all of
+    # them; users, jobs and the board directory stay on the primary
+    SHARD_DATABASE_URLS = [url for url in os.environ.get('SHARD_DATABASE_URLS', '').split(',') if url]
+    SHARD_ID_SPAN = 100_000_000  # ids per shard and table; shard n's ids start after n * SHARD_ID_SPAN
+    SHARD_FAN_OUT_WORKERS = 8  # threads querying shards in parallel, per process
+
+    # Read replica: GET requests are served from the 'replica' bind when configured
+    SQLALCHEMY_BINDS = {
+        **({'replica': os.environ['REPLICA_DATABASE_URL']} if os.environ.get('REPLICA_DATABASE_URL') else {}),
+        **{f'shard{n}': url for n, url in enumerate(SHARD_DATABASE_URLS, 1)}
+    }
+    # Seconds a user's reads stay on the primary after they write
+    REPLICA_LAG_TOLERANCE = float(os.environ.get('REPLICA_LAG_TOLERANCE', 5))
+    REPLICA_WRITE_COOKIE = 'taskflow_last_write'  # signed marker of the user's last write, shared by all workers
+
+    # Response cache for board, list and card reads
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_SIZE = 1024  # entries in the in-process LRU tier
+    RESPONSE_CACHE_MAX_ENTRY_BYTES = 1024 * 1024  # larger responses are not cached
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND')  # e.g. 'app.cache:RedisCacheBackend'
+    RESPONSE_CACHE_REDIS_URL = os.environ.get('RESPONSE_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    RESPONSE_CACHE_TTL = 300  # seconds, shared tier only
+
+    # Cross-process cache invalidation (app.bus). Defaults to PostgreSQL
+    # LISTEN/NOTIFY on a PostgreSQL database and to none (this process only) otherwise
+    INVALIDATION_BUS_BACKEND = os.environ.get('INVALIDATION_BUS_BACKEND')  # e.g. 'app.bus:FileBusBackend'
+    INVALIDATION_BUS_CHANNEL = 'taskflow_invalidation'
+    INVALIDATION_BUS_FILE = os.environ.get('INVALIDATION_BUS_FILE', '/tmp/taskflow-invalidation.log')
+    INVALIDATION_BUS_POLL_INTERVAL = 0.2  # seconds, file backend only
+    INVALIDATION_BUS_FILE_MAX_BYTES = 1024 * 1024  # file backend only; emptied once it grows past this
+
+    # Per-process membership and token revocation caches (app.access)
+    MEMBERSHIP_CACHE_TTL = 60  # seconds; bounds staleness if an invalidation is missed
+    MEMBERSHIP_CACHE_SIZE = 100000
+    TOKEN_CHECK_TTL = 30
+    TOKEN_CHECK_TTL_WITHOUT_BUS = 2  # seconds; used instead when no invalidation bus is configured
+
+    # Card descriptions at least this many bytes are stored zlib-compressed (0 turns it off)
+    DESCRIPTION_COMPRESS_MIN_BYTES = int(os.environ.get('DESCRIPTION_COMPRESS_MIN_BYTES', 1024))
+
+    # Keyset pagination (get_lists, get_cards)
+    PAGE_SIZE_DEFAULT = 100
+    PAGE_SIZE_MAX = 500
+
+    # Streamed JSON arrays (unpaginated get_user_boards, get_lists, get_cards)
+    STREAM_BATCH_SIZE = 500  # rows fetched and serialized at a time
+
+    # Idempotency-Key support for create_board, create_list and create_card (app.idempotency)
+    IDEMPOTENCY_KEY_TTL = 24 * 3600  # seconds a stored response is replayed for
+    IDEMPOTENCY_WAIT_TIMEOUT = 10  # seconds a duplicate waits for the first request before a 409
+    IDEMPOTENCY_POLL_INTERVAL = 0.05  # seconds between checks while waiting
+    IDEMPOTENCY_LOCK_TIMEOUT = 60  # seconds after which an unfinished request's key is freed
+
+    # Batch API
+    BATCH_MAX_OPERATIONS = 50
+
+    # Boards
+    BOARD_DELETE_BATCH_SIZE = 5000  # cards deleted per transaction by async board deletion
+
+    # Bulk user provisioning (POST /api/admin/users, flask provision-users)
+    PROVISION_MAX_USERS = 200  # per request; hashing costs ~0.3s of CPU per password
+    PROVISION_HASH_WORKERS = int(os.environ.get('PROVISION_HASH_WORKERS', 0)) or None  # processes, default one per CPU
+    PROVISION_BATCH_SIZE = 1000  # users per INSERT
+
+    # Board activity feed, written behind in batches (app.activity)
+    ACTIVITY_ENABLED = True
+    ACTIVITY_FLUSH_INTERVAL = float(os.environ.get('ACTIVITY_FLUSH_INTERVAL', 2))  # seconds
+    ACTIVITY_FLUSH_SIZE = 500  # entries that trigger an early flush
+    ACTIVITY_MAX_BUFFER = 50000  # entries kept per process while the database is unreachable
+
+    # Background jobs (deletes, exports, imports)
+    JOB_BACKEND = os.environ.get('JOB_BACKEND')  # import path of an app.jobs.JobBackend; local thread pool if unset
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 4))  # threads per process for the local backend
+    JOB_STALE_AFTER = int(os.environ.get('JOB_STALE_AFTER', 3600))  # seconds before a running job is taken for dead and run again
     
     # API Documentation
     SWAGGER_UI_DOC_EXPANSION = 'list'
@@ -27,7 +103,7 @@ class ProductionConfig(Config):
 
 class TestingConfig(Config):
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:')
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-string')
     JWT_ACCESS_TOKEN_EXPIRES = 24 * 3600  # 24 hours
 
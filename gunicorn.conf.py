@@ -0,0 +1,54 @@
+"""
+Gunicorn settings for serving the API in production:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is created once in the master (preload_app) and each worker is
+forked from it, sharing the loaded code copy-on-write. Every setting can
+be overridden from the environment or with GUNICORN_CMD_ARGS.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+
+# Pre-fork workers, each serving requests on a small thread pool
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+
+# Import wsgi:app (and run create_app) once in the master before forking
+preload_app = True
+
+# Recycle each worker after this many requests (jittered so they don't all restart together)
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 100))
+
+# Seconds a silent worker may live, and seconds workers get to finish requests on reload/shutdown
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # create_app opened database connections in the master; a forked worker
+    # must not reuse them, so drop the inherited pools without closing the
+    # master's sockets and let the worker open its own
+    from wsgi import app
+    from app.models import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # Write out activity entries still buffered in this worker (also done
+    # at interpreter exit; this covers exits that skip atexit handlers)
+    from app.activity import activity_log
+
+    activity_log.flush()
@@ -0,0 +1,48 @@
+"""extend list/card position indexes with id for keyset pagination
+
+Revision ID: 0dd83b5edf1a
+Revises: d7f8c193f39d
+Create Date: 2026-10-19 08:26:03.412096
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0dd83b5edf1a'
+down_revision = 'd7f8c193f39d'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, parent column)
+INDEXES = [
+    ('ix_card_list_id_position', 'card', 'list_id'),
+    ('ix_list_board_id_position', 'list', 'board_id'),
+]
+
+
+def _rebuild(columns_for):
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, table, parent in INDEXES:
+            op.drop_index(name, table_name=table)
+            op.create_index(name, table, columns_for(parent), unique=False)
+        return
+
+    # Build the replacement next to the old index so reads stay indexed,
+    # then swap names. CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        for name, table, parent in INDEXES:
+            op.create_index(f'{name}_new', table, columns_for(parent), unique=False,
+                            postgresql_concurrently=True)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.execute(f'ALTER INDEX {name}_new RENAME TO {name}')
+
+
+def upgrade():
+    _rebuild(lambda parent: [parent, 'position', 'id'])
+
+
+def downgrade():
+    _rebuild(lambda parent: [parent, 'position'])
@@ -0,0 +1,38 @@
+"""add indexes for list, card and membership access paths
+
+Revision ID: 2c1f3c003c6f
+Revises: f4b16076a76a
+Create Date: 2026-10-19 08:11:59.855617
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c1f3c003c6f'
+down_revision = 'f4b16076a76a'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_card_list_id_position', 'card', ['list_id', 'position']),
+    ('ix_list_board_id_position', 'list', ['board_id', 'position']),
+    ('ix_user_board_board_id', 'user_board', ['board_id']),
+]
+
+
+def upgrade():
+    # Build the indexes without blocking writes on large PostgreSQL tables.
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False,
+                            postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
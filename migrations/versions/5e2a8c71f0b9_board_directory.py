@@ -0,0 +1,37 @@
+"""add board_directory table for sharding
+
+Revision ID: 5e2a8c71f0b9
+Revises: 9b3f61c2d4e8
+Create Date: 2026-10-19 15:42:31.508127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2a8c71f0b9'
+down_revision = '9b3f61c2d4e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('board_directory',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('board_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'board_id')
+    )
+    with op.batch_alter_table('board_directory', schema=None) as batch_op:
+        batch_op.create_index('ix_board_directory_board_id', ['board_id'], unique=False)
+
+    # Every existing board is on the primary database
+    op.execute('INSERT INTO board_directory (user_id, board_id) SELECT user_id, board_id FROM user_board')
+
+
+def downgrade():
+    with op.batch_alter_table('board_directory', schema=None) as batch_op:
+        batch_op.drop_index('ix_board_directory_board_id')
+
+    op.drop_table('board_directory')
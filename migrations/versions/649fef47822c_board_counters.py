@@ -0,0 +1,51 @@
+"""add card/list counters to boards and lists
+
+Revision ID: 649fef47822c
+Revises: dd414c88f7fc
+Create Date: 2026-10-19 08:15:53.411704
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '649fef47822c'
+down_revision = 'dd414c88f7fc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('list_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('card_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('list', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('card_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the existing rows
+    op.execute(
+        'UPDATE list SET card_count = counts.n '
+        'FROM (SELECT list_id, COUNT(*) AS n FROM card GROUP BY list_id) AS counts '
+        'WHERE list.id = counts.list_id'
+    )
+    op.execute(
+        'UPDATE board SET card_count = counts.n '
+        'FROM (SELECT board_id, COUNT(*) AS n FROM card GROUP BY board_id) AS counts '
+        'WHERE board.id = counts.board_id'
+    )
+    op.execute(
+        'UPDATE board SET list_count = counts.n '
+        'FROM (SELECT board_id, COUNT(*) AS n FROM list GROUP BY board_id) AS counts '
+        'WHERE board.id = counts.board_id'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('list', schema=None) as batch_op:
+        batch_op.drop_column('card_count')
+
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.drop_column('card_count')
+        batch_op.drop_column('list_count')
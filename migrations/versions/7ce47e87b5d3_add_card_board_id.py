@@ -0,0 +1,38 @@
+"""add card.board_id and backfill it from the owning list
+
+Revision ID: 7ce47e87b5d3
+Revises: 2c1f3c003c6f
+Create Date: 2026-10-19 08:13:18.734960
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7ce47e87b5d3'
+down_revision = '2c1f3c003c6f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('card', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('board_id', sa.Integer(), nullable=True))
+
+    op.execute(
+        'UPDATE card SET board_id = '
+        '(SELECT list.board_id FROM list WHERE list.id = card.list_id)'
+    )
+
+    with op.batch_alter_table('card', schema=None) as batch_op:
+        batch_op.alter_column('board_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_index(batch_op.f('ix_card_board_id'), ['board_id'], unique=False)
+        batch_op.create_foreign_key('card_board_id_fkey', 'board', ['board_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('card', schema=None) as batch_op:
+        batch_op.drop_constraint('card_board_id_fkey', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_card_board_id'))
+        batch_op.drop_column('board_id')
@@ -0,0 +1,26 @@
+"""add board.version for version-keyed response caching
+
+Revision ID: a6cb3bd3fc75
+Revises: 649fef47822c
+Create Date: 2026-10-19 08:18:20.291506
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6cb3bd3fc75'
+down_revision = '649fef47822c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.drop_column('version')
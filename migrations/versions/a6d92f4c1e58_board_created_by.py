@@ -0,0 +1,30 @@
+"""add board.created_by
+
+Revision ID: a6d92f4c1e58
+Revises: e3c09b5a7d21
+Create Date: 2026-10-19 20:11:47.392815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d92f4c1e58'
+down_revision = 'e3c09b5a7d21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing boards get no creator; only admins can make them templates
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_by', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('board_created_by_fkey', 'user', ['created_by'], ['id'],
+                                    ondelete='SET NULL')
+
+
+def downgrade():
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.drop_constraint('board_created_by_fkey', type_='foreignkey')
+        batch_op.drop_column('created_by')
@@ -0,0 +1,27 @@
+"""add archived_card.version
+
+Revision ID: c47e1b9d3f62
+Revises: a6d92f4c1e58
+Create Date: 2026-10-19 20:37:05.118462
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47e1b9d3f62'
+down_revision = 'a6d92f4c1e58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cards archived before this kept no version and restore at 1
+    with op.batch_alter_table('archived_card', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('archived_card', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,26 @@
+"""add is_admin flag to user
+
+Revision ID: c7e695ee2674
+Revises: d7db6beaafe8
+Create Date: 2026-10-19 08:46:03.224871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e695ee2674'
+down_revision = 'd7db6beaafe8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_admin', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('is_admin')
@@ -0,0 +1,26 @@
+"""add is_template flag to board
+
+Revision ID: d7db6beaafe8
+Revises: e5bc74d03bf7
+Create Date: 2026-10-19 08:40:12.503117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7db6beaafe8'
+down_revision = 'e5bc74d03bf7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_template', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('board', schema=None) as batch_op:
+        batch_op.drop_column('is_template')
@@ -0,0 +1,44 @@
+"""add archived_card table for archived cards
+
+Revision ID: d7f8c193f39d
+Revises: a6cb3bd3fc75
+Create Date: 2026-10-19 08:21:12.760123
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7f8c193f39d'
+down_revision = 'a6cb3bd3fc75'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archived_card',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('list_id', sa.Integer(), nullable=False),
+    sa.Column('board_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['board_id'], ['board.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['list_id'], ['list.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_card', schema=None) as batch_op:
+        batch_op.create_index('ix_archived_card_board_id_archived_at', ['board_id', 'archived_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_archived_card_list_id'), ['list_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('archived_card', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_card_list_id'))
+        batch_op.drop_index('ix_archived_card_board_id_archived_at')
+
+    op.drop_table('archived_card')
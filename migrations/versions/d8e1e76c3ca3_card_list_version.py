@@ -0,0 +1,32 @@
+"""add version columns to card and list for optimistic concurrency
+
+Revision ID: d8e1e76c3ca3
+Revises: 0dd83b5edf1a
+Create Date: 2026-10-19 08:26:41.643224
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8e1e76c3ca3'
+down_revision = '0dd83b5edf1a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('card', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('list', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('list', schema=None) as batch_op:
+        batch_op.drop_column('version')
+
+    with op.batch_alter_table('card', schema=None) as batch_op:
+        batch_op.drop_column('version')
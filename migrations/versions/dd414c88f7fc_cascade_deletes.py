@@ -0,0 +1,47 @@
+"""delete lists, cards and memberships with ON DELETE CASCADE
+
+Revision ID: dd414c88f7fc
+Revises: 7ce47e87b5d3
+Create Date: 2026-10-19 08:15:02.114305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dd414c88f7fc'
+down_revision = '7ce47e87b5d3'
+branch_labels = None
+depends_on = None
+
+
+# (table, constraint name, column, referred table)
+FOREIGN_KEYS = [
+    ('list', 'list_board_id_fkey', 'board_id', 'board'),
+    ('card', 'card_list_id_fkey', 'list_id', 'list'),
+    ('card', 'card_board_id_fkey', 'board_id', 'board'),
+    ('user_board', 'user_board_user_id_fkey', 'user_id', 'user'),
+    ('user_board', 'user_board_board_id_fkey', 'board_id', 'board'),
+]
+
+# Matches PostgreSQL's default constraint names and gives the unnamed
+# constraints reflected from SQLite the same names in batch mode.
+NAMING_CONVENTION = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+
+def _replace_foreign_keys(ondelete):
+    for table, name, column, referred in FOREIGN_KEYS:
+        with op.batch_alter_table(table, schema=None,
+                                  naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(name, referred, [column], ['id'],
+                                        ondelete=ondelete)
+
+
+def upgrade():
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _replace_foreign_keys(None)
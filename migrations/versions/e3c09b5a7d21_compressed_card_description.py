@@ -0,0 +1,59 @@
+"""store card descriptions as bytes so they can be compressed
+
+Revision ID: e3c09b5a7d21
+Revises: b81d4e0f7a36
+Create Date: 2026-10-19 19:03:12.645210
+
+"""
+import zlib
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3c09b5a7d21'
+down_revision = 'b81d4e0f7a36'
+branch_labels = None
+depends_on = None
+
+TABLES = ('card', 'archived_card')
+
+# Format tags of app.models.CompressedText
+COMPRESSED = b'\x00z'
+ESCAPED = b'\x00p'
+
+
+def upgrade():
+    # Existing text becomes its UTF-8 bytes, which CompressedText reads as plain text
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('description',
+                   existing_type=sa.Text(),
+                   type_=sa.LargeBinary(),
+                   existing_nullable=True,
+                   postgresql_using="convert_to(description, 'UTF8')")
+
+
+def downgrade():
+    conn = op.get_bind()
+    for table in TABLES:
+        # Decompress and untag stored values before turning them back into text
+        description = sa.table(table, sa.column('id', sa.Integer), sa.column('description', sa.LargeBinary))
+        rows = conn.execute(
+            sa.select(description.c.id, description.c.description)
+            .where(sa.func.substr(description.c.description, 1, 1) == b'\x00')
+        ).all()
+        for id, value in rows:
+            value = bytes(value)
+            if value.startswith(COMPRESSED):
+                value = zlib.decompress(value[len(COMPRESSED):])
+            else:
+                value = value[len(ESCAPED):]
+            conn.execute(description.update().where(description.c.id == id).values(description=value))
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('description',
+                   existing_type=sa.LargeBinary(),
+                   type_=sa.Text(),
+                   existing_nullable=True,
+                   postgresql_using="convert_from(description, 'UTF8')")
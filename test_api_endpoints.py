@@ -1,3 +1,4 @@
+import uuid
 import requests
 
 BASE_URL = "http://backend:5000/api"
@@ -21,9 +22,17 @@ def login_user(username, password):
     response = requests.post(url, json=data)
     return response
 
-def create_board(token, title):
+def logout_user(token):
+    url = f"{BASE_URL}/auth/logout"
+    headers = {"Authorization": f"Bearer {token}"}
+    response = requests.post(url, headers=headers)
+    return response
+
+def create_board(token, title, idempotency_key=None):
     url = f"{BASE_URL}/boards"
     headers = {"Authorization": f"Bearer {token}"}
+    if idempotency_key:
+        headers["Idempotency-Key"] = idempotency_key
     data = {"title": title}
     response = requests.post(url, json=data, headers=headers)
     return response
@@ -34,6 +43,29 @@ def get_boards(token):
     response = requests.get(url, headers=headers)
     return response
 
+def get_board_stats(token, board_id):
+    url = f"{BASE_URL}/boards/{board_id}/stats"
+    headers = {"Authorization": f"Bearer {token}"}
+    response = requests.get(url, headers=headers)
+    return response
+
+def get_board_activity(token, board_id, limit=None, cursor=None):
+    url = f"{BASE_URL}/boards/{board_id}/activity"
+    headers = {"Authorization": f"Bearer {token}"}
+    params = {}
+    if limit is not None:
+        params["limit"] = limit
+    if cursor is not None:
+        params["cursor"] = cursor
+    response = requests.get(url, headers=headers, params=params)
+    return response
+
+def get_cache_stats(token):
+    url = f"{BASE_URL}/cache/stats"
+    headers = {"Authorization": f"Bearer {token}"}
+    response = requests.get(url, headers=headers)
+    return response
+
 def update_board(token, board_id, title):
     url = f"{BASE_URL}/boards/{board_id}"
     headers = {"Authorization": f"Bearer {token}"}
@@ -47,6 +79,33 @@ def delete_board(token, board_id):
     response = requests.delete(url, headers=headers)
     return response
 
+def provision_users(token, users):
+    url = f"{BASE_URL}/admin/users"
+    headers = {"Authorization": f"Bearer {token}"}
+    response = requests.post(url, json=users, headers=headers)
+    return response
+
+def export_board(token, board_id):
+    url = f"{BASE_URL}/boards/{board_id}/export"
+    headers = {"Authorization": f"Bearer {token}"}
+    response = requests.post(url, headers=headers)
+    return response
+
+def duplicate_board(token, board_id, title=None):
+    url = f"{BASE_URL}/boards/{board_id}/duplicate"
+    headers = {"Authorization": f"Bearer {token}"}
+    data = {}
+    if title is not None:
+        data["title"] = title
+    response = requests.post(url, json=data, headers=headers)
+    return response
+
+def get_job(token, job_id):
+    url = f"{BASE_URL}/jobs/{job_id}"
+    headers = {"Authorization": f"Bearer {token}"}
+    response = requests.get(url, headers=headers)
+    return response
+
 def add_member(token, board_id, email):
     url = f"{BASE_URL}/boards/{board_id}/members"
     headers = {"Authorization": f"Bearer {token}"}
@@ -150,6 +209,31 @@ def reorder_cards(token, orders):
     response = requests.post(url, json=data, headers=headers)
     return response
 
+def run_batch(token, operations):
+    url = f"{BASE_URL}/batch"
+    headers = {"Authorization": f"Bearer {token}"}
+    data = {"operations": operations}
+    response = requests.post(url, json=data, headers=headers)
+    return response
+
+def archive_card(token, card_id):
+    url = f"{BASE_URL}/cards/{card_id}/archive"
+    headers = {"Authorization": f"Bearer {token}"}
+    response = requests.post(url, headers=headers)
+    return response
+
+def get_archived_cards(token, board_id):
+    url = f"{BASE_URL}/boards/{board_id}/archived-cards"
+    headers = {"Authorization": f"Bearer {token}"}
+    response = requests.get(url, headers=headers)
+    return response
+
+def restore_card(token, card_id):
+    url = f"{BASE_URL}/archived-cards/{card_id}/restore"
+    headers = {"Authorization": f"Bearer {token}"}
+    response = requests.post(url, headers=headers)
+    return response
+
 def reset_test_user(username):
     url = f"{BASE_URL}/auth/reset-test-user"
     data = {"username": username}
@@ -182,7 +266,8 @@ def main():
 
     # Test board creation
     print("Creating board...")
-    r = create_board(token, "Test Board")
+    idempotency_key = str(uuid.uuid4())
+    r = create_board(token, "Test Board", idempotency_key)
     try:
         print(r.status_code, r.json())
     except Exception:
@@ -192,6 +277,11 @@ def main():
         return
     board_id = r.json()["id"]
 
+    # Test retrying the creation: the first response is replayed
+    print("Retrying board creation with the same Idempotency-Key...")
+    r = create_board(token, "Test Board", idempotency_key)
+    print(r.status_code, r.headers.get("Idempotent-Replayed"), r.json()["id"] == board_id)
+
     # Test get boards
     print("Getting boards...")
     r = get_boards(token)
@@ -263,12 +353,69 @@ def main():
     r = update_card(token, card_id, title="Updated Test Card")
     print(r.status_code, r.json())
 
+    # Test batch
+    print("Running batch...")
+    operations = [
+        {"method": "PUT", "path": f"/api/cards/{card_id}", "body": {"title": "Batched Test Card"}},
+        {"method": "PUT", "path": f"/api/lists/{list_id}", "body": {"title": "Batched Test List"}},
+    ]
+    r = run_batch(token, operations)
+    print(r.status_code, r.json())
+
+    # Test bulk provisioning
+    # Requires an admin token, so expect 403 here
+    print("Provisioning users...")
+    r = provision_users(token, [{"username": "bulkuser", "email": "bulkuser@example.com", "password": "bulkpassword"}])
+    print(r.status_code, r.json())
+
+    # Test board stats
+    print("Getting board stats...")
+    r = get_board_stats(token, board_id)
+    print(r.status_code, r.json())
+
+    print("Getting board activity...")
+    r = get_board_activity(token, board_id, limit=10)
+    print(r.status_code, r.json())
+
+    # Test board export job
+    print("Exporting board...")
+    r = export_board(token, board_id)
+    print(r.status_code, r.json())
+    if r.status_code == 202:
+        print("Getting export job...")
+        r = get_job(token, r.json()['job']['id'])
+        print(r.status_code, r.json())
+
+    # Test board duplication
+    print("Duplicating board...")
+    r = duplicate_board(token, board_id, "Test Board (copy)")
+    print(r.status_code, r.json())
+
     # Test reorder cards
     print("Reordering cards...")
     orders = [{"id": card_id, "position": 0, "list_id": list_id}]
     r = reorder_cards(token, orders)
     print(r.status_code, r.json())
 
+    # Test cache stats
+    # Requires an admin token, so expect 403 here
+    print("Getting cache stats...")
+    r = get_cache_stats(token)
+    print(r.status_code, r.json())
+
+    # Test archive and restore card
+    print("Archiving card...")
+    r = archive_card(token, card_id)
+    print(r.status_code, r.json())
+
+    print("Getting archived cards...")
+    r = get_archived_cards(token, board_id)
+    print(r.status_code, r.json())
+
+    print("Restoring card...")
+    r = restore_card(token, card_id)
+    print(r.status_code, r.json())
+
     # Test delete card
     print("Deleting card...")
     r = delete_card(token, card_id)
@@ -284,5 +431,12 @@ def main():
     r = delete_board(token, board_id)
     print(r.status_code, r.json())
 
+    # Test logout: the token is rejected afterwards
+    print("Logging out...")
+    r = logout_user(token)
+    print(r.status_code, r.json())
+    r = get_board_stats(token, board_id)
+    print(r.status_code, r.json())
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,40 @@
+import pytest
+from config import TestingConfig
+from app import create_app
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'app.db'}")
+    return create_app('testing')
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def login(client):
+    """Register a user and return the Authorization header of their token."""
+    def login(username):
+        client.post('/api/auth/register',
+                    json={'username': username, 'email': f'{username}@example.com', 'password': 'pw'})
+        response = client.post('/api/auth/login', json={'username': username, 'password': 'pw'})
+        return {'Authorization': f"Bearer {response.json['access_token']}"}
+    return login
+
+@pytest.fixture
+def board(client, login):
+    """A board owned by alice, as (headers, board id, helpers to add lists and cards)."""
+    headers = login('alice')
+    board_id = client.post('/api/boards', json={'title': 'Board'}, headers=headers).json['id']
+
+    def add_list(title='List'):
+        response = client.post(f'/api/boards/{board_id}/lists', json={'title': title}, headers=headers)
+        assert response.status_code == 201
+        return response.json['id']
+
+    def add_card(list_id, title='Card', **fields):
+        response = client.post(f'/api/lists/{list_id}/cards', json={'title': title, **fields}, headers=headers)
+        assert response.status_code == 201
+        return response.json['id']
+
+    return headers, board_id, add_list, add_card
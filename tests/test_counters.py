@@ -0,0 +1,55 @@
+"""
+Board and list counters stay equal to the rows they count.
+"""
+from app.models import db, Card, List
+
+def assert_counters_match(app, client, headers, board_id):
+    stats = client.get(f'/api/boards/{board_id}/stats', headers=headers).json
+    with app.app_context():
+        lists = db.session.execute(db.select(List.id).where(List.board_id == board_id)).scalars().all()
+        cards = dict(db.session.execute(
+            db.select(Card.list_id, db.func.count()).where(Card.board_id == board_id).group_by(Card.list_id)
+        ).all())
+    assert stats['list_count'] == len(lists)
+    assert stats['card_count'] == sum(cards.values())
+    assert {entry['id']: entry['card_count'] for entry in stats['lists']} == {id: cards.get(id, 0) for id in lists}
+    return stats
+
+def test_counters_follow_creates_moves_and_deletes(app, client, board):
+    headers, board_id, add_list, add_card = board
+    todo, done = add_list('Todo'), add_list('Done')
+    cards = [add_card(todo, f'Card {n}') for n in range(5)]
+    assert assert_counters_match(app, client, headers, board_id)['card_count'] == 5
+
+    assert client.put(f'/api/cards/{cards[0]}', json={'list_id': done}, headers=headers).status_code == 200
+    orders = [{'id': cards[1], 'position': 0, 'list_id': done}, {'id': cards[2], 'position': 1}]
+    assert client.post('/api/cards/reorder', json={'orders': orders}, headers=headers).status_code == 200
+    stats = assert_counters_match(app, client, headers, board_id)
+    assert {entry['id']: entry['card_count'] for entry in stats['lists']} == {todo: 3, done: 2}
+
+    assert client.delete(f'/api/cards/{cards[3]}', headers=headers).status_code == 200
+    assert assert_counters_match(app, client, headers, board_id)['card_count'] == 4
+
+def test_counters_follow_archive_and_restore(app, client, board):
+    headers, board_id, add_list, add_card = board
+    todo = add_list()
+    cards = [add_card(todo, f'Card {n}') for n in range(4)]
+
+    assert client.post(f'/api/cards/{cards[0]}/archive', headers=headers).json['archived'] == 1
+    assert client.post(f'/api/lists/{todo}/archive', headers=headers).json['archived'] == 3
+    assert assert_counters_match(app, client, headers, board_id)['card_count'] == 0
+
+    response = client.post(f'/api/boards/{board_id}/archived-cards/restore', json={'ids': cards[:2]}, headers=headers)
+    assert response.json['restored'] == 2
+    assert assert_counters_match(app, client, headers, board_id)['card_count'] == 2
+
+def test_deleting_a_list_removes_its_cards_from_the_board_count(app, client, board):
+    headers, board_id, add_list, add_card = board
+    todo, done = add_list('Todo'), add_list('Done')
+    for n in range(3):
+        add_card(todo, f'Card {n}')
+    add_card(done)
+
+    assert client.delete(f'/api/lists/{todo}', headers=headers).status_code == 200
+    stats = assert_counters_match(app, client, headers, board_id)
+    assert (stats['list_count'], stats['card_count']) == (1, 1)
@@ -0,0 +1,54 @@
+"""
+Card descriptions read back exactly as written, whether they were stored
+compressed or not, and survive archiving and duplication.
+"""
+from app.models import db, Card, CompressedText
+
+LONG = 'Steps to reproduce: open the board, drag a card, reload. ' * 100
+DESCRIPTIONS = ['', 'short', '\x00starts with NUL', 'ünïcødé ✓ ' * 200, LONG]
+
+def test_descriptions_round_trip_and_long_ones_are_compressed(app, client, board):
+    headers, board_id, add_list, add_card = board
+    list_id = add_list()
+    cards = {add_card(list_id, description=text): text for text in DESCRIPTIONS}
+
+    for card_id, text in cards.items():
+        assert client.get(f'/api/cards/{card_id}', headers=headers).json['description'] == text
+    with app.app_context():
+        raw = {
+            card_id: bytes(value) for card_id, value in db.session.execute(
+                db.select(Card.id, db.type_coerce(Card.__table__.c.description, db.LargeBinary))
+            ).all()
+        }
+    by_text = {text: raw[card_id] for card_id, text in cards.items()}
+    assert by_text[LONG].startswith(CompressedText.COMPRESSED) and len(by_text[LONG]) < len(LONG) // 10
+    assert by_text['short'] == b'short'
+    assert by_text['\x00starts with NUL'] == CompressedText.ESCAPED + b'\x00starts with NUL'
+
+    # Updates go through the same type
+    card_id = next(iter(cards))
+    assert client.put(f'/api/cards/{card_id}', json={'description': LONG}, headers=headers).status_code == 200
+    assert client.get(f'/api/cards/{card_id}', headers=headers).json['description'] == LONG
+
+def test_descriptions_are_only_returned_when_asked_for_in_lists(client, board):
+    headers, board_id, add_list, add_card = board
+    list_id = add_list()
+    add_card(list_id, description=LONG)
+
+    assert 'description' not in client.get(f'/api/lists/{list_id}/cards', headers=headers).json[0]
+    named = client.get(f'/api/lists/{list_id}/cards?fields=title,description', headers=headers).json[0]
+    assert named['description'] == LONG
+
+def test_compressed_descriptions_survive_archive_and_duplicate(client, board):
+    headers, board_id, add_list, add_card = board
+    card_id = add_card(add_list(), description=LONG)
+
+    assert client.post(f'/api/cards/{card_id}/archive', headers=headers).status_code == 200
+    archived = client.get(f'/api/boards/{board_id}/archived-cards', headers=headers).json
+    assert archived[0]['description'] == LONG
+    assert client.post(f'/api/archived-cards/{card_id}/restore', headers=headers).status_code == 200
+    assert client.get(f'/api/cards/{card_id}', headers=headers).json['description'] == LONG
+
+    copy = client.post(f'/api/boards/{board_id}/duplicate', json={'title': 'Copy'}, headers=headers).json
+    copied_id = copy['lists'][0]['cards'][0]['id']
+    assert client.get(f'/api/cards/{copied_id}', headers=headers).json['description'] == LONG
@@ -0,0 +1,45 @@
+"""
+The file bus backend keeps its file bounded, and listeners start over when
+it is emptied.
+"""
+import threading
+import time
+from types import SimpleNamespace
+from app.bus import FileBusBackend
+
+def backend(path, max_bytes):
+    app = SimpleNamespace(config={
+        'INVALIDATION_BUS_FILE': str(path),
+        'INVALIDATION_BUS_POLL_INTERVAL': 0.01,
+        'INVALIDATION_BUS_FILE_MAX_BYTES': max_bytes,
+    })
+    return FileBusBackend(app)
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_publish_empties_the_file_once_it_reaches_max_bytes(tmp_path):
+    bus = backend(tmp_path / 'bus.log', max_bytes=200)
+    for n in range(50):
+        bus.publish({'origin': 'a', 'events': [['board', n]]})
+        assert (tmp_path / 'bus.log').stat().st_size <= 200
+    assert (tmp_path / 'bus.log').read_text().splitlines()[-1] == '{"origin": "a", "events": [["board", 49]]}'
+
+def test_listener_resets_and_keeps_reading_after_the_file_is_emptied(tmp_path):
+    publisher = backend(tmp_path / 'bus.log', max_bytes=200)
+    publisher.publish({'origin': 'a', 'events': [['board', 0]]})
+    received, resets = [], []
+    listener = backend(tmp_path / 'bus.log', max_bytes=200)
+    threading.Thread(target=listener.listen, args=(received.append, lambda: resets.append(1)), daemon=True).start()
+    time.sleep(0.05)
+
+    for n in range(1, 4):
+        publisher.publish({'origin': 'a', 'events': [['board', n]]})
+    assert wait_for(lambda: len(received) == 3)
+    # The next publish no longer fits and starts the file over
+    publisher.publish({'origin': 'a', 'events': [['board', 4]]})
+    assert wait_for(lambda: resets)
+    assert wait_for(lambda: received[-1]['events'] == [['board', 4]])
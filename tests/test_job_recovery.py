@@ -0,0 +1,71 @@
+"""
+Jobs left queued or running by a server process that stopped are picked up
+by the next one.
+"""
+import threading
+from datetime import datetime, timedelta
+import pytest
+from config import TestingConfig
+from app import create_app
+from app.jobs import JobBackend, recover_jobs, run_job
+from app.models import db, Board, Job, User
+
+class RecordingBackend(JobBackend):
+    def __init__(self, app):
+        super().__init__(app)
+        self.submitted = []
+
+    def submit(self, job_id):
+        self.submitted.append(job_id)
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'jobs.db'}")
+    app = create_app('testing')
+    app.extensions['jobs'] = RecordingBackend(app)
+    return app
+
+def add_job(status, started_minutes_ago=None, **kwargs):
+    started_at = datetime.utcnow() - timedelta(minutes=started_minutes_ago) if started_minutes_ago is not None else None
+    job = Job(kind='delete_board', status=status, started_at=started_at, **kwargs)
+    db.session.add(job)
+    db.session.flush()
+    return job.id
+
+def test_recover_jobs_resubmits_queued_and_stale_running_jobs(app):
+    with app.app_context():
+        user = User(username='alice', email='alice@example.com')
+        user.set_password('pw')
+        # An async delete removes memberships before queueing the job
+        board = Board(title='Doomed')
+        db.session.add_all([user, board])
+        db.session.flush()
+        queued = add_job('queued', params={'board_id': board.id}, user_id=user.id)
+        stale = add_job('running', started_minutes_ago=120, params={'board_id': board.id})
+        cancelling = add_job('running', started_minutes_ago=120, params={'board_id': board.id}, cancel_requested=True)
+        live = add_job('running', started_minutes_ago=1, params={'board_id': board.id})
+        finished = add_job('succeeded', started_minutes_ago=120, params={'board_id': board.id})
+        db.session.commit()
+        board_id = board.id
+
+    recover_jobs(app)
+    assert app.extensions['jobs'].submitted == [queued, stale]
+
+    for job_id in app.extensions['jobs'].submitted:
+        run_job(app, job_id)
+    with app.app_context():
+        statuses = dict(db.session.execute(db.select(Job.id, Job.status)).all())
+        assert statuses == {queued: 'succeeded', stale: 'succeeded', cancelling: 'cancelled',
+                            live: 'running', finished: 'succeeded'}
+        assert db.session.get(Board, board_id) is None
+
+def test_recovery_starts_with_the_first_request_once_per_process(app, monkeypatch):
+    calls = []
+    monkeypatch.setattr('app.jobs.recover_jobs', calls.append)
+    client = app.test_client()
+    client.get('/api/boards')
+    client.get('/api/boards')
+    for thread in threading.enumerate():
+        if thread.name == 'job-recovery':
+            thread.join()
+    assert calls == [app]
@@ -0,0 +1,49 @@
+"""
+Keyset pages cover every row exactly once, even when rows are added before
+the cursor between two pages.
+"""
+
+def walk(client, url, headers, limit, between_pages=None):
+    ids, cursor = [], None
+    while True:
+        query = f'?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url + query, headers=headers)
+        assert response.status_code == 200
+        ids.extend(card['id'] for card in response.json['cards'])
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            return ids
+        if between_pages:
+            between_pages()
+
+def test_pages_neither_skip_nor_repeat_cards(client, board):
+    headers, board_id, add_list, add_card = board
+    list_id = add_list()
+    cards = [add_card(list_id, f'Card {n}') for n in range(23)]
+    url = f'/api/lists/{list_id}/cards'
+
+    for limit in (1, 5, 23, 100):
+        assert walk(client, url, headers, limit) == cards
+
+def test_cards_added_before_the_cursor_do_not_shift_later_pages(client, board):
+    headers, board_id, add_list, add_card = board
+    list_id = add_list()
+    cards = [add_card(list_id, f'Card {n}') for n in range(10)]
+
+    def insert_at_the_top():
+        add_card(list_id, 'Late', position=-1)
+
+    assert walk(client, f'/api/lists/{list_id}/cards', headers, 3, insert_at_the_top) == cards
+
+def test_cards_sharing_a_position_are_ordered_by_id(client, board):
+    headers, board_id, add_list, add_card = board
+    list_id = add_list()
+    cards = [add_card(list_id, f'Card {n}', position=0) for n in range(7)]
+
+    assert walk(client, f'/api/lists/{list_id}/cards', headers, 2) == cards
+
+def test_bad_limits_and_cursors_are_rejected(client, board):
+    headers, board_id, add_list, add_card = board
+    url = f'/api/lists/{add_list()}/cards'
+    for query in ('limit=abc', 'limit=0', 'limit=-1', 'limit=1.5', 'limit=501', 'cursor=zz', 'cursor=WzFd'):
+        assert client.get(f'{url}?{query}', headers=headers).status_code == 400, query
@@ -0,0 +1,72 @@
+"""
+Read-your-writes with a replica when writes and reads land on different
+server processes. Two app instances stand in for two gunicorn workers.
+"""
+import shutil
+import time
+import pytest
+from config import TestingConfig
+from app import create_app
+from app.models import db
+from app.replica import recent_writers, WRITE_MARKER_HEADER, _has_write_marker, _current_user_id
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{primary}')
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_BINDS', {'replica': f'sqlite:///{replica}'})
+    monkeypatch.setattr(TestingConfig, 'REPLICA_LAG_TOLERANCE', 1.0)
+    first = create_app('testing')
+    with first.app_context():
+        db.metadata.create_all(db.engines['replica'])
+    second = create_app('testing')
+    return first, second, primary, replica
+
+def login(client, username):
+    client.post('/api/auth/register', json={'username': username, 'email': f'{username}@example.com', 'password': 'pw'})
+    response = client.post('/api/auth/login', json={'username': username, 'password': 'pw'})
+    return {'Authorization': f"Bearer {response.json['access_token']}"}
+
+def test_write_marker_routes_reads_on_another_worker_to_primary(workers):
+    first, second, primary, replica = workers
+    writer = first.test_client()
+    headers = login(writer, 'alice')
+    # The replica has the user but not the board created next
+    shutil.copy(primary, replica)
+
+    response = writer.post('/api/boards', json={'title': 'Fresh'}, headers=headers)
+    assert response.status_code == 201
+    board_id = response.json['id']
+    marker = response.headers[WRITE_MARKER_HEADER]
+    # Nothing of the write is known in the other process's memory
+    recent_writers._until.clear()
+
+    reader = second.test_client()
+    assert reader.get(f'/api/boards/{board_id}', headers=headers).status_code == 404
+
+    with_header = reader.get(f'/api/boards/{board_id}', headers={**headers, WRITE_MARKER_HEADER: marker})
+    assert with_header.status_code == 200
+
+    with_cookie = second.test_client()
+    with_cookie.set_cookie(second.config['REPLICA_WRITE_COOKIE'], marker)
+    assert with_cookie.get(f'/api/boards/{board_id}', headers=headers).status_code == 200
+
+def test_write_marker_is_signed_per_user_and_expires(workers):
+    first, second, primary, replica = workers
+    writer = first.test_client()
+    alice, bob = login(writer, 'alice'), login(writer, 'bob')
+    shutil.copy(primary, replica)
+
+    response = writer.post('/api/boards', json={'title': 'Fresh'}, headers=alice)
+    board_id, marker = response.json['id'], response.headers[WRITE_MARKER_HEADER]
+    recent_writers._until.clear()
+    reader = second.test_client()
+
+    forged = marker[:-2] + ('aa' if not marker.endswith('aa') else 'bb')
+    assert reader.get(f'/api/boards/{board_id}', headers={**alice, WRITE_MARKER_HEADER: forged}).status_code == 404
+    # Alice's marker does not route Bob's reads to the primary
+    with first.test_request_context(headers={**bob, WRITE_MARKER_HEADER: marker}):
+        assert not _has_write_marker(first, _current_user_id())
+
+    time.sleep(1.1)
+    assert reader.get(f'/api/boards/{board_id}', headers={**alice, WRITE_MARKER_HEADER: marker}).status_code == 404
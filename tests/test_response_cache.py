@@ -0,0 +1,44 @@
+"""
+Cached board, list and card reads are replaced as soon as a write commits.
+"""
+
+def get(client, url, headers):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.headers['X-Cache'], response.json
+
+def test_writes_invalidate_cached_reads(client, board, login):
+    headers, board_id, add_list, add_card = board
+    list_id = add_list('Todo')
+    card_id = add_card(list_id, 'Draft')
+    urls = [f'/api/boards/{board_id}', f'/api/boards/{board_id}/lists', f'/api/lists/{list_id}/cards']
+    for url in urls:
+        assert get(client, url, headers)[0] == 'MISS'
+        assert get(client, url, headers)[0] == 'HIT'
+
+    assert client.put(f'/api/cards/{card_id}', json={'title': 'Final'}, headers=headers).status_code == 200
+    state, cards = get(client, f'/api/lists/{list_id}/cards', headers)
+    assert state == 'MISS' and [card['title'] for card in cards] == ['Final']
+    state, data = get(client, f'/api/boards/{board_id}', headers)
+    assert state == 'MISS' and data['lists'][0]['cards'][0]['title'] == 'Final'
+
+    assert client.put(f'/api/lists/{list_id}', json={'title': 'Doing'}, headers=headers).status_code == 200
+    state, lists = get(client, f'/api/boards/{board_id}/lists', headers)
+    assert state == 'MISS' and [entry['title'] for entry in lists] == ['Doing']
+
+    add_card(list_id, 'Another')
+    state, cards = get(client, f'/api/lists/{list_id}/cards', headers)
+    assert state == 'MISS' and len(cards) == 2
+
+    bob = login('bob')
+    client.post(f'/api/boards/{board_id}/members', json={'email': 'bob@example.com'}, headers=headers)
+    state, data = get(client, f'/api/boards/{board_id}', bob)
+    assert state == 'MISS' and len(data['members']) == 2
+
+def test_a_failed_write_keeps_the_cache(client, board):
+    headers, board_id, add_list, add_card = board
+    list_id = add_list()
+    get(client, f'/api/lists/{list_id}/cards', headers)
+
+    assert client.put(f'/api/lists/{list_id}', json={'title': 'New', 'version': 99}, headers=headers).status_code == 409
+    assert get(client, f'/api/lists/{list_id}/cards', headers)[0] == 'HIT'
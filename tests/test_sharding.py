@@ -0,0 +1,103 @@
+"""
+With extra shards, boards are spread over them, everything on a board stays
+on the board's shard, and the board directory on the primary lists every
+board a user is in.
+"""
+import itertools
+import pytest
+from config import TestingConfig
+from app import create_app, sharding
+from app.models import db, BoardDirectory, List
+
+SPAN = TestingConfig.SHARD_ID_SPAN
+
+def shard_of(id):
+    return (id - 1) // SPAN
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    shards = [f"sqlite:///{tmp_path / f'shard{n}.db'}" for n in (1, 2)]
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setattr(TestingConfig, 'SHARD_DATABASE_URLS', shards)
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_BINDS', {f'shard{n}': url for n, url in enumerate(shards, 1)})
+    monkeypatch.setattr(sharding, '_next_shard', itertools.count())
+    return create_app('testing')
+
+@pytest.fixture
+def alice(login):
+    return login('alice')
+
+def create_boards(client, headers, count):
+    return [client.post('/api/boards', json={'title': f'Board {n}'}, headers=headers).json['id'] for n in range(count)]
+
+def directory(app):
+    with app.app_context():
+        return set(db.session.execute(db.select(BoardDirectory.user_id, BoardDirectory.board_id)).all())
+
+def test_boards_are_spread_and_their_contents_follow_them(app, client, alice):
+    boards = create_boards(client, alice, 4)
+    assert [shard_of(id) for id in boards] == [0, 1, 2, 0]
+
+    board_id = boards[1]
+    list_id = client.post(f'/api/boards/{board_id}/lists', json={'title': 'Todo'}, headers=alice).json['id']
+    card_id = client.post(f'/api/lists/{list_id}/cards', json={'title': 'Card'}, headers=alice).json['id']
+    assert shard_of(list_id) == shard_of(card_id) == 1
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count()).select_from(List)) == 0
+
+    assert client.get(f'/api/cards/{card_id}', headers=alice).json['title'] == 'Card'
+    assert sorted(board['id'] for board in client.get('/api/boards', headers=alice).json) == sorted(boards)
+
+def test_ids_past_the_last_shard_are_not_found(client, alice):
+    missing = 9 * SPAN + 1
+    for url in (f'/api/boards/{missing}', f'/api/lists/{missing}/cards', f'/api/cards/{missing}'):
+        assert client.get(url, headers=alice).status_code == 404, url
+
+def test_membership_changes_update_the_directory(app, client, login, alice):
+    bob = login('bob')
+    boards = create_boards(client, alice, 3)
+    assert {(1, id) for id in boards} <= directory(app)
+
+    for board_id in boards:
+        response = client.post(f'/api/boards/{board_id}/members', json={'email': 'bob@example.com'}, headers=alice)
+        assert response.status_code == 200
+    assert sorted(board['id'] for board in client.get('/api/boards', headers=bob).json) == sorted(boards)
+
+    for board_id in boards:
+        assert client.delete(f'/api/boards/{board_id}/members/2', headers=alice).status_code == 200
+    assert not {entry for entry in directory(app) if entry[0] == 2}
+    assert client.get('/api/boards', headers=bob).json == []
+
+    assert client.delete(f'/api/boards/{boards[2]}', headers=alice).status_code == 200
+    assert (1, boards[2]) not in directory(app)
+
+def test_a_batch_stays_on_one_shard(app, client, alice):
+    boards = create_boards(client, alice, 3)
+    spanning = [
+        {'method': 'POST', 'path': f'/api/boards/{boards[0]}/lists', 'body': {'title': 'A'}},
+        {'method': 'POST', 'path': f'/api/boards/{boards[1]}/lists', 'body': {'title': 'B'}},
+    ]
+    assert client.post('/api/batch', json={'operations': spanning}, headers=alice).status_code == 400
+
+    operations = [
+        {'method': 'POST', 'path': '/api/boards', 'body': {'title': 'New'}},
+        {'method': 'POST', 'path': f'/api/boards/{boards[2]}/lists', 'body': {'title': 'C'}},
+    ]
+    response = client.post('/api/batch', json={'operations': operations}, headers=alice)
+    assert response.status_code == 200
+    new_board = response.json['results'][0]['body']['id']
+    assert shard_of(new_board) == 2 and (1, new_board) in directory(app)
+
+def test_a_failed_batch_takes_back_its_directory_entries(app, client, login, alice):
+    login('bob')
+    boards = create_boards(client, alice, 2)
+    before = directory(app)
+
+    operations = [
+        {'method': 'POST', 'path': f'/api/boards/{boards[1]}/members', 'body': {'email': 'bob@example.com'}},
+        {'method': 'POST', 'path': '/api/boards', 'body': {'title': 'Lost'}},
+        {'method': 'DELETE', 'path': f'/api/cards/{SPAN + 999}'},
+    ]
+    assert client.post('/api/batch', json={'operations': operations}, headers=alice).status_code == 404
+    assert directory(app) == before
+    assert 'Lost' not in [board['title'] for board in client.get('/api/boards', headers=alice).json]
@@ -0,0 +1,47 @@
+"""
+Writes based on an outdated version are refused with 409 and the current
+state, and change nothing.
+"""
+
+def test_card_update_with_an_old_version_conflicts(client, board):
+    headers, board_id, add_list, add_card = board
+    card_id = add_card(add_list(), 'Draft', description='First')
+
+    response = client.get(f'/api/cards/{card_id}', headers=headers)
+    assert response.headers['ETag'] == '"1"'
+    updated = client.put(f'/api/cards/{card_id}', json={'title': 'Mine', 'version': 1}, headers=headers)
+    assert updated.status_code == 200 and updated.json['version'] == 2
+
+    stale = client.put(f'/api/cards/{card_id}', json={'title': 'Theirs', 'version': 1}, headers=headers)
+    assert stale.status_code == 409
+    assert stale.json['current']['title'] == 'Mine'
+    assert stale.json['current']['description'] == 'First'
+    assert client.get(f'/api/cards/{card_id}', headers=headers).json['title'] == 'Mine'
+
+    if_match = client.put(f'/api/cards/{card_id}', json={'title': 'Theirs'}, headers={**headers, 'If-Match': '"1"'})
+    assert if_match.status_code == 409
+    fresh = client.put(f'/api/cards/{card_id}', json={'title': 'Theirs'}, headers={**headers, 'If-Match': '"2"'})
+    assert fresh.status_code == 200 and fresh.headers['ETag'] == '"3"'
+
+def test_list_update_with_an_old_version_conflicts(client, board):
+    headers, board_id, add_list, add_card = board
+    list_id = add_list('Todo')
+    assert client.put(f'/api/lists/{list_id}', json={'title': 'Doing', 'version': 1}, headers=headers).status_code == 200
+
+    stale = client.put(f'/api/lists/{list_id}', json={'title': 'Done', 'version': 1}, headers=headers)
+    assert stale.status_code == 409
+    assert stale.json['current']['title'] == 'Doing'
+
+def test_reorder_with_one_old_version_changes_nothing(client, board):
+    headers, board_id, add_list, add_card = board
+    list_id = add_list()
+    first, second = add_card(list_id, 'First'), add_card(list_id, 'Second')
+    assert client.put(f'/api/cards/{second}', json={'title': 'Second!'}, headers=headers).status_code == 200
+
+    orders = [{'id': first, 'position': 1, 'version': 1}, {'id': second, 'position': 0, 'version': 1}]
+    response = client.post('/api/cards/reorder', json={'orders': orders}, headers=headers)
+    assert response.status_code == 409
+    assert [card['id'] for card in response.json['current']] == [second]
+
+    cards = client.get(f'/api/lists/{list_id}/cards', headers=headers).json
+    assert [card['id'] for card in cards] == [first, second]